@@ -1,5 +1,5 @@
 from loguru import logger
-from datetime import datetime
+from datetime import datetime, date
 import re
 from typing import Optional, Union, List
 
@@ -7,35 +7,53 @@ from aiogram import Bot, Dispatcher, executor, types
 from aiogram.dispatcher.filters import Text, state
 from aiogram.dispatcher import FSMContext
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.bot.api import TelegramAPIServer, TELEGRAM_PRODUCTION
 
 from itamliterature import config
 from itamliterature.keyboards import keyboards
 from itamliterature.db import DBManager
-from itamliterature.templates import render_template
+from itamliterature.middlewares import DBSessionMiddleware
+from itamliterature.membership import MembershipCache
+from itamliterature.broadcast import Broadcaster
+from itamliterature.storage import PostgresStorage
+from itamliterature.supervisor import Supervisor
+from itamliterature.webhook import WebhookServer
+from itamliterature.templates import render_template, render_template_cached
 from itamliterature.models.models import Voting, Vote
 from itamliterature.models import states
-from itamliterature.utils import schulze, utilities
+from itamliterature.utils import schulze, utilities, metrics
 
 
 logger.add('debug.log', format='{time} {level} {message}',
            level='DEBUG', rotation='1MB', compression='zip')
 
 # filters
-admin_only = lambda message: db.is_admin(message.from_user.id) if isinstance(message, types.Message) else db.is_admin(message)
+async def admin_only(message: Union[types.Message, int]) -> bool:
+    user_id = message.from_user.id if isinstance(message, types.Message) else message
+    return await db.is_admin(user_id)
+
 filter_leaders = lambda rank: rank[:3] if len(rank) > 3 else rank
 
 # Initialize bot and dispatcher
-bot = Bot(token=config.TELEGRAM_BOT_TOKEN, parse_mode=types.ParseMode.HTML)
-dp = Dispatcher(bot, storage=MemoryStorage())
-
+bot = Bot(
+    token=config.TELEGRAM_BOT_TOKEN,
+    parse_mode=types.ParseMode.HTML,
+    server=TelegramAPIServer.from_base(config.TELEGRAM_API_URL) if config.TELEGRAM_API_URL else TELEGRAM_PRODUCTION
+)
 # Initialize db
 db = DBManager()
 
+dp = Dispatcher(bot, storage=PostgresStorage(db) if config.FSM_STORAGE == 'postgres' else MemoryStorage())
+dp.middleware.setup(DBSessionMiddleware(db))
+
+broadcaster = Broadcaster(bot, db)
+membership = MembershipCache(bot, config.CLUB_CHAT_ID, limiter=broadcaster.limiter)
+
 #region basic commands
 @dp.message_handler(commands=['start'])
 async def start(message: types.Message) -> None:
-    db.insert_bot_user(message.from_user.id)
-    await message.answer(render_template('start.j2'), reply_markup=keyboards.get_main_keyboard(admin_only(message.from_user.id)))
+    await db.insert_bot_user(message.from_user.id)
+    await message.answer(render_template_cached('start.j2'), reply_markup=keyboards.get_main_keyboard(await admin_only(message.from_user.id)))
 
 @dp.callback_query_handler(lambda c: c.data == f'{config.LITRA_CALLBACK_PREFIX}cancel', state='*')
 @dp.message_handler(Text(equals=keyboards.button_cancel, ignore_case=True), state='*')
@@ -43,6 +61,7 @@ async def cancel_handler(message: types.Message, state: FSMContext):
     """
     Allow user to cancel any action
     """
+    user_id = message.from_user.id
     message = message.message if isinstance(message, types.CallbackQuery) else message
     current_state = await state.get_state()
     if current_state is None:
@@ -51,48 +70,55 @@ async def cancel_handler(message: types.Message, state: FSMContext):
     # Cancel state and inform user about it
     await state.finish()
     # And remove keyboard (just in case)
-    await message.answer('Действие отменено.', reply_markup=keyboards.get_main_keyboard())
+    await message.answer('Действие отменено.', reply_markup=keyboards.get_main_keyboard(await admin_only(user_id)))
 
 @dp.message_handler(commands=['help'])
 async def help(message: types.Message) -> None:
-    await message.answer(render_template('help.j2'))
+    await message.answer(render_template_cached('help.j2'))
 
 #endregion
 
 #region display content
 @dp.message_handler(Text(equals=keyboards.button_allbooks, ignore_case=True))
 async def all_books(message: types.Message) -> None:
-    categories_with_books = db.get_all_categories_with_books()
-    keyboard = keyboards.get_categories_keyboard(0, len(categories_with_books), config.VOTE_BOOKS_CALLBACK_PATTERN)
-    await message.answer(render_template('categories_with_books.j2', {
-        'category': categories_with_books[0],
+    # read before the fetch, a page of a newer catalog must not be cached
+    # under an older version
+    version = db.catalog_version
+    category, count = await db.get_category_page(0)
+    keyboard = keyboards.get_categories_keyboard(0, count, config.VOTE_BOOKS_CALLBACK_PATTERN)
+    await message.answer(render_template_cached('categories_with_books.j2', (version, date.today(), 0), {
+        'category': category,
         'voting': False
     }), reply_markup=keyboard)
 
 @dp.callback_query_handler(lambda c: c.data.split(config.LITRA_CALLBACK_PREFIX)[1].startswith(config.VOTE_BOOKS_CALLBACK_PATTERN))
 async def all_books_change_page(call: types.CallbackQuery):
-    categories_with_books = db.get_all_categories_with_books()
     index = int(call.data.split(config.VOTE_BOOKS_CALLBACK_PATTERN)[1])
-    keyboard = keyboards.get_categories_keyboard(index, len(categories_with_books), config.VOTE_BOOKS_CALLBACK_PATTERN)
-    await call.message.edit_text(render_template('categories_with_books.j2', {
-            'category': categories_with_books[index],
+    version = db.catalog_version
+    category, count = await db.get_category_page(index)
+    if category is None:
+        return
+    keyboard = keyboards.get_categories_keyboard(index, count, config.VOTE_BOOKS_CALLBACK_PATTERN)
+    await call.message.edit_text(render_template_cached('categories_with_books.j2', (version, date.today(), index), {
+            'category': category,
             'voting': False
         }
     ), reply_markup=keyboard)
 
 @dp.message_handler(Text(equals=keyboards.button_allcategories, ignore_case=True))
 async def all_categories(message: types.Message) -> None:
-    categories = db.get_categories()
+    version = db.catalog_version
+    categories = await db.get_categories()
 
     await message.answer(
-        render_template('categories.j2', {
+        render_template_cached('categories.j2', (version,), {
         'categories': categories,
         })
     )
 
 @dp.message_handler(Text(equals=keyboards.button_nowreading, ignore_case=True))
 async def now_books(message: types.Message) -> None:
-    now_read_books = db.get_now_read_books()
+    now_read_books = await db.get_now_read_books()
 
     await message.answer(
         render_template('now.j2', {
@@ -103,7 +129,7 @@ async def now_books(message: types.Message) -> None:
 
 @dp.message_handler(Text(equals=keyboards.button_readbooks, ignore_case=True))
 async def already_books(message: types.Message) -> None:
-    already_read_books = db.get_already_read_books()
+    already_read_books = await db.get_already_read_books()
 
     await message.answer(
         render_template('already.j2', {
@@ -111,51 +137,65 @@ async def already_books(message: types.Message) -> None:
         })
     )
 
+async def render_vote_results(status: str, voting) -> str:
+    await db.flush_results(voting.id)
+    snapshot = await db.get_voting_snapshot(voting.id)
+    if snapshot is None or snapshot.ranks_version < snapshot.ballot_version:
+        await db.update_voting_results(voting.id, voting.voting_type)
+        snapshot = await db.get_voting_snapshot(voting.id)
+
+    rankings = {ranking['category_id']: ranking['ranks'] for ranking in snapshot.rankings}
+    count = snapshot.votes_count
+
+    if voting.voting_type == Voting.Category.value:
+        leaders = [await db.get_category_by_index(index) for index in rankings[None][:10]]
+
+        return render_template('vote_results.j2', {
+            'status': status,
+            'leaders': leaders,
+            'voting': voting,
+            'count': count
+        })
+
+    elif voting.voting_type == Voting.Book.value:
+        categories = await db.get_category_by_index(
+            [category_id for category_id in rankings if category_id is not None]
+        )
+
+        leaders = {
+            category.id: [filter_leaders(rank) for rank in rankings[category.id]][:10]
+            for category in categories
+        }
+        books = {
+            book.id: book
+            for book in await db.get_book_by_index(
+                [index for ranks in leaders.values() for rank in ranks for index in rank]
+            )
+        }
+
+        for category in categories:
+            category.leaders = [
+                [books[index] for index in rank if index in books]
+                for rank in leaders[category.id]
+            ]
+
+        return render_template('book_vote_results.j2', {
+            'categories': categories,
+            'status': status,
+            'voting': voting,
+            'count': count
+        })
+
 @dp.message_handler(Text(equals=keyboards.button_results))
 async def get_vote_results(message: types.Message) -> None:
-    status, voting = db.get_current_or_last_voting()
+    status, voting = await db.get_current_or_last_voting()
 
     if status == 'no_voting':
         await message.answer(render_template('vote_results_no_data.j2'))
         return
 
-    votes: List[Vote]
-    candidates: List[int]
-
     try:
-        if voting.voting_type == Voting.Category.value:
-            votes = db.get_category_votes(voting.id)
-            candidates = [category.id for category in db.get_categories()]
-            count = len(votes)
-            weighted_ranks = utilities.data_for_shulze(votes)
-            leaders = schulze.compute_ranks(candidates, weighted_ranks)
-            leaders = [db.get_category_by_index(index) for index in leaders[:10]]
-
-            await message.answer(render_template('vote_results.j2', {
-                'status': status,
-                'leaders': leaders,
-                'voting': voting,
-                'count': count
-            }))
-
-        elif voting.voting_type == Voting.Book.value:
-            votes = db.get_book_votes(voting.id)
-            count = len(votes)
-            weighted_ranks = utilities.data_for_shulze(votes)
-            categories = db.get_results_of_last_category_voting()
-
-            for category in categories:
-                candidates = [book.id for book in db.get_books_by_category(category)]
-                leaders = [filter_leaders(rank) for rank in schulze.compute_ranks(candidates, weighted_ranks)]
-                category.leaders = [db.get_book_by_index(index) for index in leaders[:10]]
-
-            await message.answer(render_template('book_vote_results.j2', {
-                'categories': categories,
-                'status': status,
-                'voting': voting,
-                'count': count
-            }))
-
+        await message.answer(await render_vote_results(status, voting))
     except ValueError as e:
         logger.error(f'Error while getting vote results: {e}')
         await message.answer(render_template('vote_results_no_data.j2'))
@@ -166,32 +206,31 @@ async def get_vote_results(message: types.Message) -> None:
 #region voting commands
 @dp.message_handler(Text(equals=keyboards.button_vote, ignore_case=True))
 async def vote(message: types.Message) -> None:
-    user = await bot.get_chat_member(chat_id='-1001536842419', user_id=message.from_user.id)
-
-    if user.status == 'left':
+    if not await membership.is_member(message.from_user.id):
         await message.answer(render_template('vote_cant_vote.j2'))
         return None
 
-    status, voting = db.get_current_or_last_voting()
+    status, voting = await db.get_current_or_last_voting()
 
     if status != 'now':
         await message.answer(render_template('vote_no_actual_voting.j2'))
         return None
 
     if voting.voting_type == Voting.Category.value:
-        categories = db.get_categories()
+        version = db.catalog_version
+        categories = await db.get_categories()
         await message.answer(render_template('category_vote_description.j2'))
-        await message.answer(render_template('categories.j2', {
+        await message.answer(render_template_cached('categories.j2', (version, 'voting'), {
             'categories': categories,
             'voting': True
-        }), reply_markup=keyboards.get_categories_voting_keyboard(categories))
+        }), reply_markup=keyboards.get_categories_voting_keyboard())
 
 
 
     elif voting.voting_type == Voting.Book.value:
-        last_voting = db.get_last_voting()
-        result = db.get_voting_results(last_voting.id)
-        categories = db.get_category_by_index(result)
+        last_voting = await db.get_last_voting()
+        result = await db.get_voting_results(last_voting.id)
+        categories = await db.get_category_by_index(result)
         await message.answer(render_template('vote_description.j2'))
         await message.answer('Выберите категорию, в которой хотите проголосовать',
                              reply_markup=keyboards.get_books_voting_keyboard(categories))
@@ -210,19 +249,19 @@ async def insert_votes(message: types.Message, state: FSMContext):
         await message.answer(render_template('vote_incorrect_input.j2'))
         return
 
-    _, voting = db.get_current_or_last_voting()
+    _, voting = await db.get_current_or_last_voting()
     
-    insert_result = db.insert_vote(voting.id, message.from_user.id, voting.voting_type, Vote(votes))
+    insert_result = await db.insert_vote(voting.id, message.from_user.id, voting.voting_type, Vote(votes))
 
     if insert_result == True:
         if voting.voting_type == Voting.Category.value:
-            categories = db.get_category_by_index(votes)
+            categories = await db.get_category_by_index(votes)
             await message.answer(render_template('vote_success.j2', {
                 'selected_values': categories
             }))
             await state.finish()
         elif voting.voting_type == Voting.Book.value:
-            books = db.get_book_by_index(votes)
+            books = await db.get_book_by_index(votes)
             await message.answer(render_template('vote_success.j2', {
                 'selected_values': books
             }))
@@ -235,18 +274,22 @@ async def insert_votes(message: types.Message, state: FSMContext):
 async def all_books_change_page(call: types.CallbackQuery):
     index = int(call.data.split('books_voting_')[1])
 
-    category = db.get_category_by_index([index])
-    category = db.get_categories_with_books(category)
+    category = await db.get_category_by_index([index])
+    category = await db.get_categories_with_books(category)
 
-    last_voting = db.get_last_voting()
-    result = db.get_voting_results(last_voting.id)
-    categories = db.get_category_by_index(result)
+    last_voting = await db.get_last_voting()
+    result = await db.get_voting_results(last_voting.id)
+    categories = await db.get_category_by_index(result)
 
     await call.message.edit_text(render_template('category_with_books.j2', {
             'category': category[0]
         }
     ), reply_markup=keyboards.get_books_voting_keyboard(categories))
 
+@dp.chat_member_handler(lambda update: update.chat.id == config.CLUB_CHAT_ID)
+async def club_member_changed(update: types.ChatMemberUpdated) -> None:
+    membership.set_status(update.new_chat_member.user.id, update.new_chat_member.status)
+
 #endregion
 
 #region admin commands
@@ -256,6 +299,13 @@ async def all_books_change_page(call: types.CallbackQuery):
 async def admin(message: types.Message):
     await message.answer(render_template('admin.j2'), reply_markup=keyboards.get_admin_keyboard)
 
+@dp.message_handler(admin_only, commands='metrics')
+async def show_metrics(message: types.Message):
+    await message.answer(render_template('metrics.j2', {
+        'pool_status': db.pool_status(),
+        'timers': metrics.get_timers()
+    }))
+
 @dp.message_handler(admin_only, commands='start_voting')
 async def start_voting(message: types.Message, state: FSMContext):
     await message.answer(render_template('start_voting_enter_dates.j2'))
@@ -263,23 +313,31 @@ async def start_voting(message: types.Message, state: FSMContext):
 
 @dp.message_handler(admin_only, commands='stop_voting')
 async def stop_voting(message: types.Message):
-    result = db.end_voting()
+    result = await db.end_voting()
     if not result:
         await message.answer('Нет активного голосования')
     else:
         await message.answer('Успешно')
+        status, voting = await db.get_current_or_last_voting()
+        try:
+            await broadcaster.broadcast('voting_results', voting.id, await render_vote_results(status, voting))
+        except ValueError as e:
+            logger.error(f'Results of voting {voting.id} hadnt been broadcast: {e}')
 
 @dp.message_handler(state=states.VotingProcess.enter_vote_dates)
 async def insert_voting_dates(message: types.Message, state: FSMContext):
     try:
         start_date, finish_date = message.text.split('-')
-        db.start_voting(start_date, finish_date)
+        started = await db.start_voting(start_date, finish_date)
     except ValueError as e:
         await message.answer('Неверный формат даты')
         return
     
     await message.answer('Успешно')
     await state.finish()
+    if started:
+        _, voting = await db.get_current_or_last_voting()
+        await broadcaster.announce_start(voting)
 
 #-------------------------------------------------------------------------------
 
@@ -290,7 +348,7 @@ async def add_admin(message: types.Message, state: FSMContext):
 
 @dp.message_handler(state=states.AdminProcess.add_admin)
 async def insert_admin(message: types.Message, state: FSMContext):
-    db.add_admin(int(message.text))
+    await db.add_admin(int(message.text))
     await message.answer('Успешно')
     await state.finish()
 
@@ -303,7 +361,7 @@ async def add_category(message: types.Message, state: FSMContext):
 
 @dp.message_handler(state=states.CategoryProcess.add_category)
 async def insert_category(message: types.Message, state: FSMContext):
-    db.add_category(message.text)
+    await db.add_category(message.text)
     await message.answer('Успешно')
     await state.finish()
 
@@ -311,7 +369,7 @@ async def insert_category(message: types.Message, state: FSMContext):
 
 @dp.message_handler(admin_only, commands='add_book')
 async def add_book(message: types.Message, state: FSMContext):
-    categories = db.get_categories()
+    categories = await db.get_categories()
     await message.answer(render_template('add_book.j2', {
         'categories': categories
     }))
@@ -320,7 +378,7 @@ async def add_book(message: types.Message, state: FSMContext):
 @dp.message_handler(state=states.BookProcess.add_book)
 async def insert_book(message: types.Message, state: FSMContext):
     book_name, book_category = message.text.split(',')
-    db.add_book(book_name, int(book_category))
+    await db.add_book(book_name, int(book_category))
     await message.answer('Успешно')
     await state.finish()
 
@@ -339,7 +397,7 @@ async def insert_reading_dates(message: types.Message, state: FSMContext):
     dates, book = message.text.split(',')
     try:
         start_date, finish_date = dates.split('-')
-        db.set_reading_dates(start_date, finish_date, book)
+        await db.set_reading_dates(start_date, finish_date, book)
     except ValueError as e:
         await message.answer('Неверный формат даты')
         return
@@ -349,9 +407,35 @@ async def insert_reading_dates(message: types.Message, state: FSMContext):
 
 #endregion
 
+async def on_startup(dp: Dispatcher) -> None:
+    await db.init()
+    if config.MEMBERSHIP_WARM_UP:
+        membership.start_warm_up(
+            user_id for user_id in await db.get_bot_user_ids()
+            if user_id % config.BOT_WORKERS == config.WORKER_INDEX
+        )
+    broadcaster.start_watching()
+
+async def on_shutdown(dp: Dispatcher) -> None:
+    membership.close()
+    await broadcaster.close()
+    await db.close_connection()
+
+async def on_supervisor_startup() -> None:
+    await db.init()
+    await db.close_connection()
+
 @logger.catch
 def main():
-    executor.start_polling(dp, skip_updates=True)
+    if config.BOT_MODE == 'worker':
+        WebhookServer(dp, on_startup, on_shutdown, set_webhook=False).run()
+    elif config.BOT_WORKERS > 1:
+        Supervisor(bot, config.BOT_WORKERS, on_supervisor_startup).run()
+    elif config.BOT_MODE == 'webhook':
+        WebhookServer(dp, on_startup, on_shutdown).run()
+    else:
+        executor.start_polling(dp, skip_updates=True, on_startup=on_startup, on_shutdown=on_shutdown,
+                               allowed_updates=types.AllowedUpdates.all())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,237 @@
+import asyncio
+import contextvars
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import aiohttp
+from aiogram import Bot
+from aiogram.utils import exceptions
+from loguru import logger
+
+from itamliterature import config
+from itamliterature.db import DBManager
+from itamliterature.templates import render_template
+
+# seconds between two checkpoints of a running broadcast
+CHECKPOINT_INTERVAL = 1
+# sends failing for another reason than flood control are given up after
+MAX_ATTEMPTS = 3
+# seconds close waits for the messages in flight before it cancels them
+CLOSE_TIMEOUT = 10
+
+
+def last_voting_day(voting) -> date:
+    # a voting is over at the start of its finish day
+    return voting.voting_finish - timedelta(days=1)
+
+
+class RateLimiter:
+    """Spaces sends out to a global rate and a minimal interval per chat.
+
+    Every call reserves the next free slot before it sleeps, so concurrent
+    senders never share one.
+    """
+
+    def __init__(self, rate: float, chat_interval: float):
+        self.interval = 1 / rate
+        self.chat_interval = chat_interval
+        self._next_at = 0.0
+        self._chat_next_at: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        now = time.monotonic()
+        at = max(now, self._next_at, self._chat_next_at.get(chat_id, 0.0))
+        self._next_at = at + self.interval
+        self._chat_next_at[chat_id] = at + self.chat_interval
+        await asyncio.sleep(at - now)
+
+    def pause(self, seconds: float) -> None:
+        # flood control holds back the whole bot, not just one chat
+        self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+class Broadcaster:
+    """Sends voting announcements to every bot user.
+
+    A broadcast stores its text and one delivery row per user, senders mark
+    the rows as they go and a restarted bot resumes with the pending ones.
+    The rate limit is kept in the process, so only worker 0 sends: the other
+    workers create their broadcasts and it picks them up when notified. A
+    broadcast is locked while it is sent, another bot on the same database
+    skips it. Flood control errors pause all sends for the time Telegram
+    asks for, users that blocked the bot are marked as failed.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        db: DBManager,
+        rate: float = config.BROADCAST_RATE,
+        chat_interval: float = config.BROADCAST_CHAT_INTERVAL,
+        concurrency: int = config.BROADCAST_CONCURRENCY,
+        enabled: bool = config.BROADCASTS,
+        sender: bool = config.WORKER_INDEX == 0,
+    ):
+        self.bot = bot
+        self.db = db
+        self.enabled = enabled
+        self.sender = sender
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, chat_interval)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def broadcast(self, kind: str, voting_id: Optional[int], text: str) -> None:
+        if not self.enabled:
+            return
+
+        broadcast_id = await self.db.create_broadcast(kind, voting_id, text)
+        if broadcast_id is not None and self.sender:
+            self._start(broadcast_id)
+
+    async def announce_start(self, voting) -> None:
+        await self.broadcast(
+            "voting_start",
+            voting.id,
+            render_template(
+                "broadcast_voting_start.j2",
+                {"voting": voting, "last_day": last_voting_day(voting)},
+            ),
+        )
+
+    def start_watching(self) -> None:
+        """Reminds of voting deadlines and resumes abandoned broadcasts.
+
+        Also starts the broadcasts other workers create, on the sender.
+        """
+        if not self.enabled or not self.sender:
+            return
+
+        self._watch_task = asyncio.create_task(
+            self._watch(), context=contextvars.Context()
+        )
+
+    async def close(self) -> None:
+        # messages in flight are sent to the end and saved, so a resumed
+        # broadcast doesn't send them again
+        self._closing = True
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*self._tasks.values(), return_exceptions=True),
+                CLOSE_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            # cancelled, the sent messages are still saved by _run
+            logger.warning("broadcasts hadnt stopped in time, cancelled")
+
+    def _start(self, broadcast_id: int) -> None:
+        if broadcast_id in self._tasks:
+            return
+
+        # the task outlives the update, and the DB session scope, it came from
+        task = asyncio.create_task(
+            self._run(broadcast_id), context=contextvars.Context()
+        )
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda task: self._tasks.pop(broadcast_id, None))
+
+    async def _watch(self) -> None:
+        while True:
+            self.db.broadcasts_created.clear()
+            try:
+                status, voting = await self.db.get_current_or_last_voting()
+                if status == "now" and date.today() >= last_voting_day(voting):
+                    await self.broadcast(
+                        "voting_deadline",
+                        voting.id,
+                        render_template(
+                            "broadcast_voting_deadline.j2",
+                            {"voting": voting, "last_day": last_voting_day(voting)},
+                        ),
+                    )
+                for broadcast_id in await self.db.get_unfinished_broadcast_ids():
+                    self._start(broadcast_id)
+            except Exception as error:
+                logger.error(f"broadcasts hadnt been checked {error}")
+            try:
+                await asyncio.wait_for(
+                    self.db.broadcasts_created.wait(), config.BROADCAST_CHECK_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, broadcast_id: int) -> None:
+        async with self.db.broadcast_lock(broadcast_id) as locked:
+            if not locked:
+                return
+
+            broadcast = await self.db.get_broadcast(broadcast_id)
+            pending = iter(await self.db.get_pending_deliveries(broadcast_id))
+            statuses: Dict[int, str] = {}
+
+            async def send_pending() -> None:
+                for user_id in pending:
+                    status = await self._send(user_id, broadcast.text)
+                    if status is None:
+                        return
+                    statuses[user_id] = status
+
+            senders = [
+                asyncio.create_task(send_pending()) for _ in range(self.concurrency)
+            ]
+            try:
+                while not all(sender.done() for sender in senders):
+                    await asyncio.wait(senders, timeout=CHECKPOINT_INTERVAL)
+                    await self._checkpoint(broadcast_id, statuses)
+                await asyncio.gather(*senders)
+            finally:
+                for sender in senders:
+                    sender.cancel()
+                await self._checkpoint(broadcast_id, statuses)
+
+            if not self._closing:
+                await self.db.finish_broadcast(broadcast_id)
+
+    async def _checkpoint(self, broadcast_id: int, statuses: Dict[int, str]) -> None:
+        if not statuses:
+            return
+
+        saved = dict(statuses)
+        statuses.clear()
+        try:
+            await self.db.save_deliveries(broadcast_id, saved)
+        except Exception:
+            # saved with the next checkpoint
+            statuses.update(saved)
+            raise
+
+    async def _send(self, user_id: int, text: str) -> Optional[str]:
+        """Returns "sent" or "failed", None if closed before it was sent."""
+        attempts = 0
+        while True:
+            await self.limiter.wait(user_id)
+            if self._closing:
+                return None
+            try:
+                await self.bot.send_message(user_id, text)
+                return "sent"
+            except exceptions.RetryAfter as error:
+                logger.warning(f"broadcast is flood controlled for {error.timeout}s")
+                self.limiter.pause(error.timeout)
+            except (exceptions.Unauthorized, exceptions.BadRequest) as error:
+                # blocked the bot, deactivated or never started it
+                logger.info(f"broadcast to {user_id} had failed {error}")
+                return "failed"
+            except (
+                exceptions.TelegramAPIError,
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+            ) as error:
+                attempts += 1
+                if attempts >= MAX_ATTEMPTS:
+                    logger.error(f"broadcast to {user_id} had failed {error}")
+                    return "failed"
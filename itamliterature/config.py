@@ -6,11 +6,35 @@ load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_BOTANIM_CHANNEL_ID = int(os.getenv("TELEGRAM_BOTANIM_CHANNEL_ID", "0"))
+# only members of this chat can vote
+CLUB_CHAT_ID = int(os.getenv("CLUB_CHAT_ID", "-1001536842419"))
+# base url of a Bot API server, empty for api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# "polling" or "webhook", "worker" is set by the supervisor for its workers
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+# public base url Telegram sends updates to, e.g. https://litra.example.com
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8000"))
+# worker processes updates are sharded to by user id, 1 handles them in
+# the main process
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+# worker i serves the updates of its shard on 127.0.0.1:WORKER_PORT + i
+WORKER_PORT = int(os.getenv("WORKER_PORT", "8100"))
+# shard of a worker, set by the supervisor
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
 
 POSTGRES_HOST = os.getenv('POSTGRES_HOST', '')
 POSTGRES_USER = os.getenv("POSTGRES_USER", '')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
 POSTGRES_DB = os.getenv('POSTGRES_DB', '')
+POSTGRES_POOL_SIZE = int(os.getenv('POSTGRES_POOL_SIZE', '5'))
+POSTGRES_MAX_OVERFLOW = int(os.getenv('POSTGRES_MAX_OVERFLOW', '10'))
+POSTGRES_POOL_RECYCLE = int(os.getenv('POSTGRES_POOL_RECYCLE', '1800'))
+POSTGRES_POOL_TIMEOUT = int(os.getenv('POSTGRES_POOL_TIMEOUT', '30'))
 
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -18,4 +42,46 @@ TEMPLATES_DIR = BASE_DIR / "templates"
 DATE_FORMAT = "%d.%m.%Y"
 VOTE_BOOKS_CALLBACK_PATTERN = "vote_"
 
-LITRA_CALLBACK_PREFIX = "litra:"
\ No newline at end of file
+LITRA_CALLBACK_PREFIX = "litra:"
+
+# seconds between reloads of the cached admin list, 0 disables reloading
+ADMINS_CACHE_TTL = int(os.getenv("ADMINS_CACHE_TTL", "0"))
+
+# "dict" or "matrix", see itamliterature.utils.schulze.compute_ranks. "matrix"
+# keeps the pairwise matrix of a voting and updates it vote by vote, "dict"
+# ranks all ballots of a voting again on every recompute
+SCHULZE_ENGINE = os.getenv("SCHULZE_ENGINE", "matrix")
+# seconds votes of one voting are collected before its results are recomputed
+RESULTS_RECOMPUTE_DELAY = float(os.getenv("RESULTS_RECOMPUTE_DELAY", "1"))
+
+# rendered pages kept by templates.render_template_cached
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "256"))
+
+# "postgres" keeps FSM states in the database so several workers can share
+# them, "memory" keeps them in the process
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")
+# seconds a worker trusts its cached copy of a user's state, users are
+# always served by the same worker so the copy can't be changed elsewhere
+FSM_CACHE_TTL = int(os.getenv("FSM_CACHE_TTL", "60"))
+# seconds after which an untouched state is considered abandoned
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", "86400"))
+
+# seconds a club chat membership is trusted, and a missing one
+MEMBERSHIP_CACHE_TTL = int(os.getenv("MEMBERSHIP_CACHE_TTL", "3600"))
+MEMBERSHIP_NEGATIVE_TTL = int(os.getenv("MEMBERSHIP_NEGATIVE_TTL", "300"))
+# users whose membership is remembered, the least recently asked go first
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+# look up the membership of every bot user at startup
+MEMBERSHIP_WARM_UP = bool(int(os.getenv("MEMBERSHIP_WARM_UP", "0")))
+
+# 0 keeps this bot from sending broadcasts, no announcements, deadline
+# reminders or resumed broadcasts
+BROADCASTS = bool(int(os.getenv("BROADCASTS", "1")))
+# messages per second a broadcast sends at most, Telegram allows about 30
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+# seconds between two messages to the same chat
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1"))
+# messages a broadcast has in flight at most
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+# seconds between looks for voting deadlines and abandoned broadcasts
+BROADCAST_CHECK_INTERVAL = int(os.getenv("BROADCAST_CHECK_INTERVAL", "600"))
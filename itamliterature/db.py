@@ -1,12 +1,24 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text, desc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import text, desc, func, select, event, update, tuple_, literal
 from sqlalchemy.exc import NoResultFound, DataError, IntegrityError
+import asyncpg
 
 from loguru import logger
-from datetime import datetime, date
-from typing import Union, Tuple, List, Optional
+from collections import Counter, defaultdict
+import contextlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, date, timedelta, timezone
+from pathlib import Path
+from typing import Union, Tuple, List, Optional, AsyncIterator, Iterable
+import asyncio
+import copy
+import hashlib
+import itertools
 import random
+import time
 
 from itamliterature import config
 from itamliterature.models.db_models import (
@@ -18,134 +30,478 @@ from itamliterature.models.db_models import (
     VoteBook,
     BotUser,
     VoteResults,
+    VotingSnapshot,
+    BallotTally,
+    FsmRecord,
+    Broadcast,
+    BroadcastDelivery,
 )
 from itamliterature.models import models
-from itamliterature.utils import schulze, utilities
+from itamliterature.utils import schulze, utilities, metrics
+
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# channel bot processes announce changed caches on
+CACHE_CHANNEL = "litra_cache"
+SEED_FILE = Path(__file__).parent / "db.sql"
+
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "db_session", default=None
+)
+# set while a DBManager call runs, calls it makes are part of it
+_in_call: ContextVar[bool] = ContextVar("db_in_call", default=False)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long a connection checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.timer("db_pool_checkout_wait").observe(
+                time.perf_counter() - started
+            )
 
 
 class DBManager:
     # region inner methods
     def __init__(self):
+        self._pairwise_matrices: dict[
+            int, dict[Optional[int], schulze.PairwiseMatrix]
+        ] = {}
+        # ballot_version of the voting snapshot the cached matrices match
+        self._pairwise_versions: dict[int, int] = {}
+        # serializes ballot writes and matrix builds of one voting
+        self._voting_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._catalog: Optional[models.Catalog] = None
+        self._catalog_version = 0
+        self._catalog_lock = asyncio.Lock()
+        self._voting_state: Optional[models.VotingState] = None
+        self._voting_version = 0
+        self._voting_state_lock = asyncio.Lock()
+        self._voting_results: dict[int, List[int]] = {}
+        # pending debounced recomputes, voting id to (voting type, task)
+        self._results_updates: dict[int, Tuple[int, asyncio.Task]] = {}
+        self._admins: Optional[set[int]] = None
+        self._admins_refresh_task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        # set when a broadcast is created, here or by another worker
+        self.broadcasts_created = asyncio.Event()
+        # admin reloads started by notifications, kept until they finish
+        self._admins_reloads: set[asyncio.Task] = set()
         self._connect()
-        self._recreate_table()
+        self._count_queries()
         self.db_session()
 
+    async def init(self) -> None:
+        await self._recreate_table()
+        await self._migrate()
+        await self._load_seed()
+        self._invalidate_catalog()
+        await self._load_admins()
+        if config.ADMINS_CACHE_TTL > 0:
+            self._admins_refresh_task = asyncio.create_task(self._refresh_admins())
+        self._listen_task = asyncio.create_task(self._listen())
+
     def _connect(self) -> None:
-        self.engine = create_engine(
-            f"postgresql://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}/{config.POSTGRES_DB}",
+        self.engine = create_async_engine(
+            f"postgresql+asyncpg://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}/{config.POSTGRES_DB}",
             echo=True,
+            poolclass=TimedQueuePool,
+            pool_size=config.POSTGRES_POOL_SIZE,
+            max_overflow=config.POSTGRES_MAX_OVERFLOW,
+            pool_recycle=config.POSTGRES_POOL_RECYCLE,
+            pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+            pool_pre_ping=True,
         )
 
-    def _recreate_table(self) -> None:
-        # Base.metadata.drop_all(self.engine)
-        Base.metadata.create_all(self.engine)
+    async def _recreate_table(self) -> None:
+        async with self.engine.begin() as connection:
+            # await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
 
-        try:
-            with open("itamliterature/db.sql", "r") as file:
-                sql = file.read().split("\n")
+    async def _load_seed(self) -> None:
+        """Loads db.sql unless a seed with the same checksum was loaded already.
 
-            queries = [query.strip() for query in sql if query.strip()]
+        The whole file goes to the server as one script in one transaction.
+        Every INSERT in it skips rows that already exist, so a changed seed
+        only adds what is new. A seed that fails stops the bot.
+        """
+        seed = SEED_FILE.read_text()
+        checksum = hashlib.sha256(seed.encode()).hexdigest()
 
-            with self.engine.connect() as connection:
-                for query in queries:
-                    connection.execute(text(query))
-                connection.commit()
-                logger.info(".sql file had been loaded successfully")
-        except Exception as error:
-            logger.error(f".sql file hand't been loaded {error}")
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext('seed_meta'))")
+            )
+            loaded = await connection.scalar(
+                text("SELECT checksum FROM seed_meta WHERE name = :name"),
+                {"name": SEED_FILE.name},
+            )
+            if loaded == checksum:
+                return
+
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.execute(seed)
+
+            await connection.execute(
+                text(
+                    "INSERT INTO seed_meta (name, checksum) VALUES (:name, :checksum) "
+                    "ON CONFLICT (name) DO UPDATE "
+                    "SET checksum = excluded.checksum, loaded_at = now()"
+                ),
+                {"name": SEED_FILE.name, "checksum": checksum},
+            )
+        logger.info(".sql file had been loaded successfully")
+
+    async def _migrate(self) -> None:
+        """Applies the migrations/NNNN_name.sql files that haven't run yet."""
+        async with self.engine.begin() as connection:
+            # serializes processes starting at the same time
+            await connection.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))")
+            )
+            await connection.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version integer PRIMARY KEY, "
+                    "name text NOT NULL, "
+                    "applied_at timestamptz NOT NULL DEFAULT now())"
+                )
+            )
+            applied = set(
+                await connection.scalars(text("SELECT version FROM schema_migrations"))
+            )
+
+            for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                version, name = path.stem.split("_", 1)
+                if int(version) in applied:
+                    continue
+
+                for query in utilities.split_sql(path.read_text()):
+                    await connection.execute(text(query))
+                await connection.execute(
+                    text(
+                        "INSERT INTO schema_migrations (version, name) "
+                        "VALUES (:version, :name)"
+                    ),
+                    {"version": int(version), "name": name},
+                )
+                logger.info(f"migration {path.name} had been applied")
 
     def db_session(self) -> None:
-        self.Session = sessionmaker(bind=self.engine)
-        self.session = self.Session()
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def update_scope(self) -> AsyncIterator[AsyncSession]:
+        """Shares one session between the DBManager calls of an update.
+
+        DBSessionMiddleware opens it around every update. Each call ends its
+        transaction when it returns, so the connection goes back to the pool
+        while the handler waits for Telegram.
+        """
+        async with self.Session() as session:
+            token = _current_session.set(session)
+            try:
+                yield session
+            finally:
+                _current_session.reset(token)
+
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        """Yields the session of the current scope, opening one if needed.
+
+        Calls nested in another call share its transaction. A call made
+        outside of an update gets a session of its own, closed when it
+        returns, a call made in an update ends the transaction it began.
+        """
+        session = _current_session.get()
+        if session is None:
+            async with self.Session() as session:
+                tokens = _current_session.set(session), _in_call.set(True)
+                try:
+                    yield session
+                finally:
+                    _in_call.reset(tokens[1])
+                    _current_session.reset(tokens[0])
+            return
+
+        if _in_call.get():
+            yield session
+            return
+
+        token = _in_call.set(True)
+        try:
+            yield session
+        except BaseException:
+            if session.in_transaction():
+                await session.rollback()
+            raise
+        else:
+            # reads autobegin a transaction too, nothing is left to write
+            if session.in_transaction():
+                await session.commit()
+        finally:
+            _in_call.reset(token)
+
+    def _count_queries(self) -> None:
+        # kept on the execution context, a statement that fails never gets
+        # to after_cursor_execute and leaves nothing behind
+        @event.listens_for(self.engine.sync_engine, "before_cursor_execute")
+        def before_cursor_execute(
+            connection, cursor, statement, parameters, context, executemany
+        ) -> None:
+            context._query_started = time.perf_counter()
+
+        @event.listens_for(self.engine.sync_engine, "after_cursor_execute")
+        def after_cursor_execute(
+            connection, cursor, statement, parameters, context, executemany
+        ) -> None:
+            metrics.timer("db_query").observe(
+                time.perf_counter() - context._query_started
+            )
 
-    def close_connection(self) -> None:
-        self.engine.dispose()
+    async def _connect_dedicated(self) -> asyncpg.Connection:
+        # outside of the pool, for connections held as long as the bot runs
+        return await asyncpg.connect(
+            f"postgresql://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}/{config.POSTGRES_DB}"
+        )
 
-    def __del__(self) -> None:
-        self.close_connection()
+    def pool_status(self) -> str:
+        return self.engine.pool.status()
+
+    async def _notify(self, session: AsyncSession, cache: str) -> None:
+        # delivered to the other processes when the session commits
+        await session.execute(select(func.pg_notify(CACHE_CHANNEL, cache)))
+
+    async def _listen(self) -> None:
+        """Drops the caches other bot processes announce as changed.
+
+        Every bot process caches the catalog, the voting state, the results
+        and the admins, the process that changes one of them notifies the
+        others. That is another worker, or import_votes run next to a single
+        bot. New broadcasts are announced the same way, to the worker that
+        sends them. Notifications missed while reconnecting are covered by
+        dropping all caches and looking for broadcasts.
+        """
+        while True:
+            try:
+                connection = await self._connect_dedicated()
+            except Exception as error:
+                logger.error(f"cache notifications hadnt been listened {error}")
+                await asyncio.sleep(1)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda connection: closed.set())
+            try:
+                await connection.add_listener(CACHE_CHANNEL, self._on_notification)
+                self._on_notification(connection, 0, CACHE_CHANNEL, "all")
+                await closed.wait()
+            finally:
+                await connection.close()
+
+    def _on_notification(self, connection, pid: int, channel: str, cache: str) -> None:
+        if cache in ("catalog", "all"):
+            self._invalidate_catalog()
+        if cache in ("voting", "all"):
+            self._invalidate_voting_state()
+        if cache in ("results", "all"):
+            self._voting_results.clear()
+        if cache in ("broadcasts", "all"):
+            self.broadcasts_created.set()
+        if cache in ("admins", "all"):
+            task = asyncio.create_task(self._load_admins())
+            self._admins_reloads.add(task)
+            task.add_done_callback(self._admins_reloaded)
+
+    def _admins_reloaded(self, task: asyncio.Task) -> None:
+        self._admins_reloads.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # the old set stays, the periodic refresh or the next
+            # notification tries again
+            logger.error(f"admins hadnt been reloaded {task.exception()}")
+
+    async def close_connection(self) -> None:
+        if self._admins_refresh_task is not None:
+            self._admins_refresh_task.cancel()
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+        for task in self._admins_reloads:
+            task.cancel()
+        await self.flush_results()
+        await self.engine.dispose()
 
     # endregion
 
     # region get methods
 
-    # region get categories
-    def get_categories(self) -> List[models.Category]:
-        categories: List[models.Category] = [
-            models.Category(category)
-            for category in self.session.query(BookCategory).all()
-        ]
+    # region catalog
 
-        return categories
+    @property
+    def catalog_version(self) -> int:
+        """Bumped on every catalog change, a cache key for rendered pages.
 
-    def get_all_categories_with_books(self) -> List[models.Category]:
-        categories: List[models.Category] = self.get_categories()
-        return self.get_categories_with_books(categories)
+        Read it before fetching what the page shows, the data is then at
+        least as new as the key.
+        """
+        return self._catalog_version
 
-    def get_books_by_category(self, category: models.Category) -> List[models.Book]:
-        return [
-            models.Book(book)
-            for book in self.session.query(Book)
-            .filter(Book.category_id == category.id)
-            .all()
-        ]
+    async def get_catalog(self) -> models.Catalog:
+        """Returns the cached catalog snapshot, loading it on a miss.
+
+        Catalog writes bump the version and drop the snapshot, a load that
+        raced with a write is returned but not cached.
+        """
+        catalog = self._catalog
+        if catalog is not None:
+            return catalog
+
+        async with self._catalog_lock:
+            if self._catalog is not None:
+                return self._catalog
+
+            version = self._catalog_version
+            async with self.session_scope() as session:
+                categories = list(
+                    await session.scalars(select(BookCategory).order_by(BookCategory.id))
+                )
+                books = list(await session.scalars(select(Book).order_by(Book.id)))
+
+            catalog = models.Catalog.build(version, categories, books)
+            if version == self._catalog_version:
+                self._catalog = catalog
+            return catalog
+
+    def _invalidate_catalog(self) -> None:
+        self._catalog_version += 1
+        self._catalog = None
+        # candidates of every voting may have changed
+        self._pairwise_matrices.clear()
 
-    def get_category_by_index(self, indexes: List[int]) -> List[models.Category]:
+    # endregion
+
+    # region get categories
+    async def get_categories(self) -> List[models.Category]:
+        catalog = await self.get_catalog()
+        return [copy.copy(category) for category in catalog.categories]
+
+    async def get_all_categories_with_books(self) -> List[models.Category]:
+        categories: List[models.Category] = await self.get_categories()
+        return await self.get_categories_with_books(categories)
+
+    async def get_category_page(
+        self, index: int
+    ) -> Tuple[Optional[models.Category], int]:
+        """Returns the index-th category with its books and the category count.
+
+        Served from the catalog when it is loaded. Otherwise only the page is
+        fetched, so paging doesn't load the whole catalog.
+        """
+        catalog = self._catalog
+        if catalog is not None or index < 0:
+            catalog = catalog or await self.get_catalog()
+            if not 0 <= index < len(catalog.categories):
+                return None, len(catalog.categories)
+            category = copy.copy(catalog.categories[index])
+            category.books = list(category.books)
+            return category, len(catalog.categories)
+
+        page_id = (
+            select(BookCategory.id)
+            .order_by(BookCategory.id)
+            .offset(index)
+            .limit(1)
+            .scalar_subquery()
+        )
+        total = select(func.count()).select_from(BookCategory).scalar_subquery()
+        async with self.session_scope() as session:
+            rows = (
+                await session.execute(
+                    select(BookCategory, Book, total)
+                    .outerjoin(Book, Book.category_id == BookCategory.id)
+                    .filter(BookCategory.id == page_id)
+                    .order_by(Book.id)
+                )
+            ).all()
+            if not rows:
+                return None, await session.scalar(total.element)
+
+        category = models.Category(rows[0][0])
+        category.books = [models.Book(book) for _, book, _ in rows if book is not None]
+        return category, rows[0][2]
+
+    async def get_books_by_category(
+        self, category: models.Category
+    ) -> List[models.Book]:
+        catalog = await self.get_catalog()
+        cached_category = catalog.categories_by_id.get(category.id)
+        return list(cached_category.books) if cached_category is not None else []
+
+    async def get_category_by_index(
+        self, indexes: List[int]
+    ) -> List[models.Category]:
+        catalog = await self.get_catalog()
+        indexes = set(indexes)
         return [
-            models.Category(category)
-            for category in self.session.query(BookCategory)
-            .filter(BookCategory.id.in_(indexes))
-            .all()
+            copy.copy(category)
+            for category in catalog.categories
+            if category.id in indexes
         ]
 
-    def get_categories_with_books(
+    async def get_categories_with_books(
         self, categories: List[models.Category]
     ) -> List[models.Category]:
-        categories = categories
+        catalog = await self.get_catalog()
         for category in categories:
-            category.books = [
-                models.Book(book)
-                for book in self.session.query(Book).filter(
-                    Book.category_id == category.id
-                )
-            ]
+            cached_category = catalog.categories_by_id.get(category.id)
+            category.books = (
+                list(cached_category.books) if cached_category is not None else []
+            )
         return categories
 
-    def get_results_of_last_category_voting(self) -> List[models.Category]:
-        last_voting = self.get_last_voting()
+    async def get_results_of_last_category_voting(self) -> List[models.Category]:
+        last_voting = await self.get_last_voting()
         if last_voting is None:
             return []
 
-        results = self.get_voting_results(last_voting.id)
-        return self.get_category_by_index(results)
+        results = await self.get_voting_results(last_voting.id)
+        return await self.get_category_by_index(results)
 
     # endregion
 
     # region get books
 
-    def get_books(self) -> List[models.Book]:
-        return [models.Book(book) for book in self.session.query(Book).all()]
+    async def get_books(self) -> List[models.Book]:
+        catalog = await self.get_catalog()
+        return list(catalog.books)
 
-    def get_book_by_index(self, indexes: List[int]) -> List[Book]:
-        return self.session.query(Book).filter(Book.id.in_(indexes)).all()
+    async def get_book_by_index(self, indexes: List[int]) -> List[Book]:
+        catalog = await self.get_catalog()
+        indexes = set(indexes)
+        return [row for book_id, row in catalog.book_rows.items() if book_id in indexes]
 
-    def get_now_read_books(self) -> List[models.Book]:
+    async def get_now_read_books(self) -> List[models.Book]:
+        # read_finish is a date, "> now()" in SQL means after today
+        today = date.today()
+        catalog = await self.get_catalog()
         return [
-            models.Book(book)
-            for book in self.session.query(Book)
-            .filter(Book.read_finish > datetime.now())
-            .all()
+            book
+            for book in catalog.books
+            if book.read_finish is not None and book.read_finish > today
         ]
 
-    def get_already_read_books(self) -> List[Book]:
+    async def get_already_read_books(self) -> List[Book]:
+        today = date.today()
+        catalog = await self.get_catalog()
         return [
-            models.Book(book)
-            for book in self.session.query(Book)
-            .filter(
-                Book.read_start.isnot(None),
-                Book.read_finish.isnot(None),
-                Book.read_finish < datetime.now(),
-            )
-            .all()
+            book
+            for book in catalog.books
+            if book.read_start is not None
+            and book.read_finish is not None
+            and book.read_finish <= today
         ]
 
     # endregion
@@ -154,73 +510,116 @@ class DBManager:
 
     # region voting methods
 
-    def get_current_or_last_voting(self) -> Tuple[str, Voting]:
-        if (
-            self.session.query(Voting).order_by(desc(Voting.voting_finish)).first()
-            is None
-        ):
-            return ("no_voting", None)
-        try:
-            return (
-                "now",
-                self.session.query(Voting)
-                .filter(
-                    Voting.voting_start.isnot(None),
-                    Voting.voting_finish > datetime.now(),
+    async def get_voting_state(self) -> models.VotingState:
+        """Returns the cached voting state, resolving it on a miss.
+
+        The state expires when the current voting finishes, start_voting and
+        end_voting drop it right away.
+        """
+        state = self._voting_state
+        if state is not None and not state.is_expired(datetime.now()):
+            return state
+
+        async with self._voting_state_lock:
+            state = self._voting_state
+            if state is not None and not state.is_expired(datetime.now()):
+                return state
+
+            version = self._voting_version
+            async with self.session_scope() as session:
+                votings = list(await session.scalars(select(Voting)))
+
+            state = models.VotingState.build(version, votings, datetime.now())
+            if version == self._voting_version:
+                self._voting_state = state
+            return state
+
+    def _invalidate_voting_state(self) -> None:
+        self._voting_version += 1
+        self._voting_state = None
+        self._voting_results.clear()
+
+    async def get_current_or_last_voting(self) -> Tuple[str, Voting]:
+        state = await self.get_voting_state()
+        return (state.status, state.voting)
+
+    async def get_voting_results(self, voting_id: int) -> List[int]:
+        if voting_id in self._voting_results:
+            return list(self._voting_results[voting_id])
+
+        async with self.session_scope() as session:
+            result = (
+                await session.scalars(
+                    select(VoteResults).filter(VoteResults.voting_id == voting_id)
                 )
-                .one(),
-            )
-        except NoResultFound:
-            return (
-                "last",
-                self.session.query(Voting).order_by(desc(Voting.voting_finish)).first(),
-            )
-
-    def get_voting_results(self, voting_id: int) -> List[int]:
-        result = (
-            self.session.query(VoteResults)
-            .filter(VoteResults.voting_id == voting_id)
-            .one()
-        )
-
-        return [result.first_place_id, result.second_place_id, result.third_place_id]
-
-    def get_last_voting(self) -> Union[Voting, None]:
-        try:
-            return (
-                self.session.query(Voting)
-                .filter(Voting.voting_finish < datetime.now())
-                .order_by(Voting.id.desc())
-                .first()
-            )
-        except NoResultFound:
-            return None
+            ).one()
 
-    def get_category_votes(self, voting_id: int) -> List[models.Vote]:
-        return [
-            models.Vote(
-                [
-                    vote.first_category_id,
-                    vote.second_category_id,
-                    vote.third_category_id,
-                ]
-            )
-            for vote in self.session.query(VoteCategory).filter(
-                VoteCategory.voting_id == voting_id
-            )
+        results = [
+            result.first_place_id,
+            result.second_place_id,
+            result.third_place_id,
         ]
-
-    def get_book_votes(self, vote_id: int) -> List[models.Vote]:
-        return [
-            models.Vote([vote.first_book_id, vote.second_book_id, vote.third_book_id])
-            for vote in self.session.query(VoteBook).filter(
-                VoteBook.voting_id == vote_id
+        self._voting_results[voting_id] = results
+        return list(results)
+
+    async def get_last_voting(self) -> Union[Voting, None]:
+        state = await self.get_voting_state()
+        return state.last_finished
+
+    async def get_weighted_ranks(
+        self, voting_id: int, voting_type: int
+    ) -> List[Tuple[List[List[int]], int]]:
+        """Returns (ranks, weight) pairs of a voting for schulze.compute_ranks.
+
+        Read from ballot_tally, so the size of the result depends on the
+        number of distinct ballots only.
+        """
+        async with self.session_scope() as session:
+            rows = await session.execute(
+                select(
+                    BallotTally.first_id,
+                    BallotTally.second_id,
+                    BallotTally.third_id,
+                    BallotTally.count,
+                ).filter(BallotTally.voting_id == voting_id, BallotTally.count > 0)
             )
-        ]
+            return [
+                ([[first], [second], [third]], count)
+                for first, second, third, count in rows
+            ]
+
+    async def get_user_vote(
+        self, voting_id: int, user_id: int, voting_type: int
+    ) -> Optional[models.Vote]:
+        async with self.session_scope() as session:
+            if voting_type == models.Voting.Category.value:
+                vote = await session.get(
+                    VoteCategory, (voting_id, user_id), populate_existing=True
+                )
+                if vote is None:
+                    return None
+                return models.Vote(
+                    [
+                        vote.first_category_id,
+                        vote.second_category_id,
+                        vote.third_category_id,
+                    ]
+                )
+            elif voting_type == models.Voting.Book.value:
+                vote = await session.get(
+                    VoteBook, (voting_id, user_id), populate_existing=True
+                )
+                if vote is None:
+                    return None
+                return models.Vote(
+                    [vote.first_book_id, vote.second_book_id, vote.third_book_id]
+                )
 
-    def insert_vote(
+    async def insert_vote(
         self, voting_id: int, user_id: int, voting_type: int, vote: models.Vote
     ) -> bool:
+        ballot = vote
+
         if voting_type == models.Voting.Category.value:
             vote = VoteCategory(
                 voting_id=voting_id,
@@ -237,30 +636,485 @@ class DBManager:
                 second_book_id=vote.second_vote,
                 third_book_id=vote.third_vote,
             )
-        try:
-            self.session.merge(vote)
-            self.session.commit()
-        except Exception as e:
-            self.session.rollback()
-            return False
 
-        logger.info(f"vote had been inserted user_id={user_id}, vote={vote}")
-
-        self.update_voting_results(voting_id, voting_type)
+        async with self._voting_locks[voting_id]:
+            async with self.session_scope() as session:
+                try:
+                    # the old ballot is read under the lock and taken back
+                    # from the tally in the same transaction
+                    await self._lock_ballots(session, [(voting_id, user_id)])
+                    old_ballot = await self.get_user_vote(
+                        voting_id, user_id, voting_type
+                    )
+                    await session.merge(vote)
+                    deltas = [(ballot, 1)]
+                    if old_ballot is not None:
+                        deltas.append((old_ballot, -1))
+                    # tally rows are updated in one order by every writer
+                    for tallied, delta in sorted(
+                        deltas, key=lambda item: utilities.ranks_from_vote(item[0])
+                    ):
+                        await self._tally_ballot(session, voting_id, tallied, delta)
+                    ballot_version = await session.scalar(
+                        insert(VotingSnapshot)
+                        .values(voting_id=voting_id, ballot_version=1)
+                        .on_conflict_do_update(
+                            index_elements=[VotingSnapshot.voting_id],
+                            set_={"ballot_version": VotingSnapshot.ballot_version + 1},
+                        )
+                        .returning(VotingSnapshot.ballot_version)
+                    )
+                    await session.commit()
+                except Exception as e:
+                    await session.rollback()
+                    return False
+
+            logger.info(f"vote had been inserted user_id={user_id}, vote={vote}")
+
+            # matrices that aren't cached yet are built from the committed ballots
+            matrices = self._pairwise_matrices.get(voting_id)
+            if (
+                matrices is not None
+                and self._pairwise_versions.get(voting_id) != ballot_version - 1
+            ):
+                # another process voted in between, the matrices are rebuilt
+                del self._pairwise_matrices[voting_id]
+                matrices = None
+            if matrices is not None:
+                catalog = await self.get_catalog()
+                if old_ballot is not None:
+                    ranks = utilities.ranks_from_vote(old_ballot)
+                    for scope in self._ballot_scopes(catalog, ranks, matrices):
+                        matrices[scope].remove_ballot(ranks)
+                ranks = utilities.ranks_from_vote(ballot)
+                for scope in self._ballot_scopes(catalog, ranks, matrices):
+                    matrices[scope].add_ballot(ranks)
+                self._pairwise_versions[voting_id] = ballot_version
+
+        self._schedule_results_update(voting_id, voting_type)
 
         return True
 
-    def update_voting_results(self, voting_id: int, voting_type: int) -> None:
+    async def _lock_ballots(
+        self, session: AsyncSession, keys: Iterable[tuple[int, int]]
+    ) -> None:
+        """Takes the transaction locks of the (voting id, user id) ballots.
+
+        A ballot is read and replaced under its lock, so two writers, the
+        other workers or import_votes, can't both take the same old ballot
+        back from the tally. The locks are taken in one order.
+        """
+        voting_ids, user_ids = zip(*keys)
+        await session.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(voting_id, hashtext(user_id::text)) "
+                "FROM unnest(CAST(:voting_ids AS integer[]), CAST(:user_ids AS bigint[])) "
+                "AS ballot (voting_id, user_id) "
+                "ORDER BY voting_id, hashtext(user_id::text)"
+            ),
+            {"voting_ids": list(voting_ids), "user_ids": list(user_ids)},
+        )
+
+    async def _tally_ballot(
+        self, session: AsyncSession, voting_id: int, ballot: models.Vote, delta: int
+    ) -> None:
+        # rows that drop to zero are kept, the signature is likely to come back
+        statement = insert(BallotTally).values(
+            voting_id=voting_id,
+            first_id=ballot.first_vote,
+            second_id=ballot.second_vote,
+            third_id=ballot.third_vote,
+            count=delta,
+        )
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[
+                    BallotTally.voting_id,
+                    BallotTally.first_id,
+                    BallotTally.second_id,
+                    BallotTally.third_id,
+                ],
+                set_={"count": BallotTally.count + delta},
+            )
+        )
+
+    async def import_votes(
+        self, rows: Iterable[tuple[int, int, int, int, int]], chunk_size: int = 500
+    ) -> models.VotesImport:
+        """Imports ballots collected outside of the bot.
+
+        rows are (user_id, voting_id, first, second, third) tuples, they are
+        checked against the catalog and written chunk_size at a time. A later
+        row of the same member and voting replaces the earlier one, like
+        voting again in the bot does. Results of the touched votings are
+        recomputed once at the end.
+        """
+        report = models.VotesImport()
+        catalog = await self.get_catalog()
+        async with self.session_scope() as session:
+            voting_types = dict(
+                (await session.execute(select(Voting.id, Voting.voting_type))).all()
+            )
+        candidates = {
+            models.Voting.Category.value: catalog.categories_by_id,
+            models.Voting.Book.value: catalog.books_by_id,
+        }
+
+        chunk: dict[tuple[int, int], models.Vote] = {}
+        voting_ids = set()
+        for number, row in enumerate(rows, start=1):
+            try:
+                user_id, voting_id, *ranks = [int(value) for value in row]
+            except (TypeError, ValueError):
+                report.skipped.append((number, "not a row of integers"))
+                continue
+
+            if len(ranks) != 3:
+                report.skipped.append((number, "expected three choices"))
+            elif voting_id not in voting_types:
+                report.skipped.append((number, f"no voting {voting_id}"))
+            elif any(rank not in candidates[voting_types[voting_id]] for rank in ranks):
+                report.skipped.append((number, "unknown candidate"))
+            else:
+                chunk[(voting_id, user_id)] = models.Vote(ranks)
+                voting_ids.add(voting_id)
+
+            if len(chunk) >= chunk_size:
+                report.imported += await self._import_votes_chunk(chunk, voting_types)
+                chunk = {}
+        if chunk:
+            report.imported += await self._import_votes_chunk(chunk, voting_types)
+
+        for voting_id in sorted(voting_ids):
+            await self.update_voting_results(voting_id, voting_types[voting_id])
+        logger.info(f"{report.imported} votes had been imported")
+        return report
+
+    async def _import_votes_chunk(
+        self, chunk: dict[tuple[int, int], models.Vote], voting_types: dict[int, int]
+    ) -> int:
+        voting_ids = sorted({voting_id for voting_id, _ in chunk})
+        tables = {
+            models.Voting.Category.value: (
+                VoteCategory,
+                ("first_category_id", "second_category_id", "third_category_id"),
+            ),
+            models.Voting.Book.value: (
+                VoteBook,
+                ("first_book_id", "second_book_id", "third_book_id"),
+            ),
+        }
+
+        async with contextlib.AsyncExitStack() as stack:
+            # same lock order everywhere, so two imports can't deadlock
+            for voting_id in voting_ids:
+                await stack.enter_async_context(self._voting_locks[voting_id])
+
+            async with self.session_scope() as session:
+                await self._lock_ballots(session, chunk)
+                await session.execute(
+                    insert(BotUser).on_conflict_do_nothing(),
+                    [{"telegram_id": user_id} for user_id in {u for _, u in chunk}],
+                )
+
+                tally = Counter()
+                for voting_type, (table, columns) in tables.items():
+                    keys = [key for key in chunk if voting_types[key[0]] == voting_type]
+                    if not keys:
+                        continue
+
+                    old_ballots = await session.execute(
+                        select(
+                            table.voting_id,
+                            *[getattr(table, column) for column in columns],
+                        ).filter(tuple_(table.voting_id, table.user_id).in_(keys))
+                    )
+                    for voting_id, *ranks in old_ballots:
+                        tally[(voting_id, *ranks)] -= 1
+
+                    values = []
+                    for voting_id, user_id in keys:
+                        vote = chunk[(voting_id, user_id)]
+                        ranks = (vote.first_vote, vote.second_vote, vote.third_vote)
+                        tally[(voting_id, *ranks)] += 1
+                        values.append(
+                            dict(
+                                voting_id=voting_id,
+                                user_id=user_id,
+                                **dict(zip(columns, ranks)),
+                            )
+                        )
+                    statement = insert(table)
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=[table.voting_id, table.user_id],
+                            set_={
+                                column: statement.excluded[column] for column in columns
+                            },
+                        ),
+                        values,
+                    )
+
+                tally = [
+                    dict(
+                        voting_id=voting_id,
+                        first_id=first,
+                        second_id=second,
+                        third_id=third,
+                        count=count,
+                    )
+                    for (voting_id, first, second, third), count in sorted(
+                        tally.items()
+                    )
+                    if count
+                ]
+                if tally:
+                    statement = insert(BallotTally)
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=[
+                                BallotTally.voting_id,
+                                BallotTally.first_id,
+                                BallotTally.second_id,
+                                BallotTally.third_id,
+                            ],
+                            set_={
+                                "count": BallotTally.count + statement.excluded.count
+                            },
+                        ),
+                        tally,
+                    )
+
+                statement = insert(VotingSnapshot)
+                await session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[VotingSnapshot.voting_id],
+                        set_={"ballot_version": VotingSnapshot.ballot_version + 1},
+                    ),
+                    [
+                        {"voting_id": voting_id, "ballot_version": 1}
+                        for voting_id in voting_ids
+                    ],
+                )
+                await session.commit()
+
+            # rebuilt from ballot_tally by the recompute at the end of the import
+            for voting_id in voting_ids:
+                self._pairwise_matrices.pop(voting_id, None)
+
+        return len(chunk)
+
+    async def _get_voting_categories(self, voting_id: int) -> List[int]:
+        """Returns the winners of the category voting that preceded a voting."""
+        async with self.session_scope() as session:
+            result = (
+                await session.scalars(
+                    select(VoteResults)
+                    .join(Voting, Voting.id == VoteResults.voting_id)
+                    .filter(
+                        Voting.voting_type == models.Voting.Category.value,
+                        Voting.id < voting_id,
+                    )
+                    .order_by(Voting.id.desc())
+                    .limit(1)
+                )
+            ).first()
+
+        if result is None:
+            return []
+        return list(
+            dict.fromkeys(
+                [result.first_place_id, result.second_place_id, result.third_place_id]
+            )
+        )
+
+    async def _get_pairwise_matrices(
+        self, voting_id: int, voting_type: int, ballot_version: int
+    ) -> dict[Optional[int], schulze.PairwiseMatrix]:
+        """Returns the pairwise matrices of a voting, the voting lock must be held.
+
+        There is one matrix per scope of _get_ranking_input. Cached matrices
+        behind ballot_version missed ballots of another process and are rebuilt.
+        """
+        matrices = self._pairwise_matrices.get(voting_id)
+        if (
+            matrices is not None
+            and self._pairwise_versions.get(voting_id) == ballot_version
+        ):
+            return matrices
+
+        candidates, weighted_ranks_by_scope = await self._get_ranking_input(
+            voting_id, voting_type
+        )
+        matrices = {
+            scope: schulze.PairwiseMatrix(ids, weighted_ranks_by_scope[scope])
+            for scope, ids in candidates.items()
+        }
+        self._pairwise_matrices[voting_id] = matrices
+        self._pairwise_versions[voting_id] = ballot_version
+        return matrices
+
+    async def _get_ranking_input(
+        self, voting_id: int, voting_type: int
+    ) -> Tuple[dict[Optional[int], List[int]], dict[Optional[int], list]]:
+        """Returns the candidates and the weighted ranks of every ranking scope.
+
+        The scope None ranks all candidates. A book voting also has a scope
+        per winning category, ranking only the books of that category.
+        """
+        catalog = await self.get_catalog()
         if voting_type == models.Voting.Category.value:
-            votes = self.get_category_votes(voting_id)
-            candidates = [category.id for category in self.get_categories()]
+            candidates = {None: [category.id for category in catalog.categories]}
         elif voting_type == models.Voting.Book.value:
-            votes = self.get_book_votes(voting_id)
-            candidates = [category.id for category in self.get_books()]
+            candidates = {None: [book.id for book in catalog.books]}
+            for category_id in await self._get_voting_categories(voting_id):
+                category = catalog.categories_by_id.get(category_id)
+                if category is not None:
+                    candidates[category_id] = [book.id for book in category.books]
+
+        # each ballot is fed only to the scopes of the categories it mentions
+        weighted_ranks_by_scope = {scope: [] for scope in candidates}
+        for ranks, weight in await self.get_weighted_ranks(voting_id, voting_type):
+            for scope in self._ballot_scopes(catalog, ranks, candidates):
+                weighted_ranks_by_scope[scope].append((ranks, weight))
+        return candidates, weighted_ranks_by_scope
+
+    @staticmethod
+    def _ballot_scopes(
+        catalog: models.Catalog, ranks: List[List[int]], scopes
+    ) -> set[Optional[int]]:
+        """Returns the matrix scopes a ballot can change.
+
+        A ballot that ranks none of the books of a category leaves its
+        pairwise matrix untouched, so it is skipped for that category.
+        """
+        result = {None}
+        for book_id in itertools.chain(*ranks):
+            book = catalog.books_by_id.get(book_id)
+            if book is not None and book.category_id in scopes:
+                result.add(book.category_id)
+        return result
+
+    async def get_voting_snapshot(self, voting_id: int) -> Optional[VotingSnapshot]:
+        async with self.session_scope() as session:
+            # other processes bump the versions, a loaded row may be behind
+            return await session.get(VotingSnapshot, voting_id, populate_existing=True)
+
+    def _schedule_results_update(self, voting_id: int, voting_type: int) -> None:
+        """Recomputes the results of a voting in the background.
+
+        Votes arriving within RESULTS_RECOMPUTE_DELAY of the first one are
+        covered by the same recompute.
+        """
+        if voting_id in self._results_updates:
+            return
+
+        self._results_updates[voting_id] = (
+            voting_type,
+            asyncio.create_task(self._delayed_results_update(voting_id, voting_type)),
+        )
+
+    async def _delayed_results_update(self, voting_id: int, voting_type: int) -> None:
+        # the task inherits the session of the update that scheduled it
+        _current_session.set(None)
+        await asyncio.sleep(config.RESULTS_RECOMPUTE_DELAY)
+        # votes from now on schedule a recompute of their own
+        del self._results_updates[voting_id]
+        try:
+            async with self.session_scope() as session:
+                # one process recomputes a voting at a time, the others retry
+                # and usually find the rankings up to date by then
+                locked = await session.scalar(
+                    select(
+                        func.pg_try_advisory_xact_lock(
+                            func.hashtext("voting_snapshot"), voting_id
+                        )
+                    )
+                )
+                if not locked:
+                    self._schedule_results_update(voting_id, voting_type)
+                    return
+
+                snapshot = await self.get_voting_snapshot(voting_id)
+                if (
+                    snapshot is not None
+                    and snapshot.ranks_version >= snapshot.ballot_version
+                ):
+                    return
+                # the lock is released with the commit of the new rankings
+                await self.update_voting_results(voting_id, voting_type)
+        except Exception as error:
+            logger.error(f"results of voting {voting_id} hadn't been updated {error}")
+
+    async def flush_results(self, voting_id: Optional[int] = None) -> None:
+        """Runs the pending recomputes of a voting, or of all votings, now."""
+        voting_ids = (
+            [voting_id] if voting_id is not None else list(self._results_updates)
+        )
+        for voting_id in voting_ids:
+            if voting_id not in self._results_updates:
+                continue
+
+            voting_type, task = self._results_updates.pop(voting_id)
+            task.cancel()
+            await self.update_voting_results(voting_id, voting_type)
+
+    async def update_voting_results(self, voting_id: int, voting_type: int) -> None:
+        async with self._voting_locks[voting_id]:
+            snapshot = await self.get_voting_snapshot(voting_id)
+            ballot_version = snapshot.ballot_version if snapshot is not None else 0
+            if config.SCHULZE_ENGINE == "matrix":
+                matrices = await self._get_pairwise_matrices(
+                    voting_id, voting_type, ballot_version
+                )
+                rankings = [
+                    {"category_id": scope, "ranks": matrix.compute_ranks()}
+                    for scope, matrix in matrices.items()
+                ]
+                votes_count = matrices[None].ballots_count
+            else:
+                # other engines rank all ballots from scratch every time
+                candidates, weighted_ranks_by_scope = await self._get_ranking_input(
+                    voting_id, voting_type
+                )
+                rankings = [
+                    {
+                        "category_id": scope,
+                        "ranks": schulze.compute_ranks(
+                            ids,
+                            weighted_ranks_by_scope[scope],
+                            engine=config.SCHULZE_ENGINE,
+                        ),
+                    }
+                    for scope, ids in candidates.items()
+                ]
+                votes_count = sum(weight for _, weight in weighted_ranks_by_scope[None])
 
-        weighted_ranks = utilities.data_for_shulze(votes)
+        async with self.session_scope() as session:
+            # a slower recompute must not overwrite rankings of newer ballots
+            statement = insert(VotingSnapshot).values(
+                voting_id=voting_id,
+                ballot_version=ballot_version,
+                ranks_version=ballot_version,
+                votes_count=votes_count,
+                rankings=rankings,
+            )
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[VotingSnapshot.voting_id],
+                    set_={
+                        "ranks_version": statement.excluded.ranks_version,
+                        "votes_count": statement.excluded.votes_count,
+                        "rankings": statement.excluded.rankings,
+                        "updated_at": func.now(),
+                    },
+                    where=VotingSnapshot.ranks_version
+                    <= statement.excluded.ranks_version,
+                )
+            )
+            await session.commit()
 
-        leaders = schulze.compute_ranks(candidates, weighted_ranks)
+        leaders = rankings[0]["ranks"]
         try:
             leaders = models.VoteResult(
                 [random.choice(leader) for leader in leaders[:3]]
@@ -276,67 +1130,89 @@ class DBManager:
             third_place_id=leaders.third_place,
         )
 
-        self.session.merge(result)
-        self.session.commit()
+        async with self.session_scope() as session:
+            await session.merge(result)
+            await self._notify(session, "results")
+            await session.commit()
+        self._voting_results[voting_id] = [
+            leaders.first_place,
+            leaders.second_place,
+            leaders.third_place,
+        ]
 
     # endregion
 
     # region admin methods
 
-    def start_voting(self, start: str, finish: Optional[str] = None) -> bool:
-        format_date = lambda date: datetime.strptime(date, "%d.%m.%Y").strftime(
-            "%Y-%m-%d"
-        )
-        status, voting = self.get_current_or_last_voting()
-
-        if status == "no_voting":
-            self.session.add(
-                Voting(
-                    voting_start=format_date(start),
-                    voting_finish=format_date(finish),
-                    voting_type=models.Voting.Category.value,
+    async def start_voting(self, start: str, finish: Optional[str] = None) -> bool:
+        format_date = lambda date: datetime.strptime(date, "%d.%m.%Y").date()
+        status, voting = await self.get_current_or_last_voting()
+
+        async with self.session_scope() as session:
+            if status == "no_voting":
+                session.add(
+                    Voting(
+                        voting_start=format_date(start),
+                        voting_finish=format_date(finish),
+                        voting_type=models.Voting.Category.value,
+                    )
                 )
-            )
-            logger.info(f"voting had been started; start={start}, finish={finish}")
-            return True
+                await self._notify(session, "voting")
+                await session.commit()
+                self._invalidate_voting_state()
+                logger.info(f"voting had been started; start={start}, finish={finish}")
+                return True
 
-        if voting.voting_finish > datetime.strptime(start, "%d.%m.%Y").date():
-            logger.error(f"voting hadnt been started error=wrong date")
-            return False
+            if voting.voting_finish > datetime.strptime(start, "%d.%m.%Y").date():
+                logger.error(f"voting hadnt been started error=wrong date")
+                return False
 
-        if status == "last":
-            try:
-                match voting.voting_type:
-                    case models.Voting.Category.value:
-                        self.session.add(
-                            Voting(
-                                voting_start=format_date(start),
-                                voting_finish=format_date(finish),
-                                voting_type=models.Voting.Book.value,
+            if status == "last":
+                try:
+                    match voting.voting_type:
+                        case models.Voting.Category.value:
+                            session.add(
+                                Voting(
+                                    voting_start=format_date(start),
+                                    voting_finish=format_date(finish),
+                                    voting_type=models.Voting.Book.value,
+                                )
                             )
-                        )
-                    case models.Voting.Book.value:
-                        self.session.add(
-                            Voting(
-                                voting_start=format_date(start),
-                                voting_finish=format_date(finish),
-                                voting_type=models.Voting.Category.value,
+                        case models.Voting.Book.value:
+                            session.add(
+                                Voting(
+                                    voting_start=format_date(start),
+                                    voting_finish=format_date(finish),
+                                    voting_type=models.Voting.Category.value,
+                                )
                             )
-                        )
-                logger.info(f"voting had been started; start={start}, finish={finish}")
-            except DataError as error:
-                logger.error(f"voting hadnt been started error={error}")
-                return False
-
-        self.session.commit()
+                    logger.info(
+                        f"voting had been started; start={start}, finish={finish}"
+                    )
+                except DataError as error:
+                    logger.error(f"voting hadnt been started error={error}")
+                    return False
+
+            await self._notify(session, "voting")
+            await session.commit()
+        self._invalidate_voting_state()
         return True
 
-    def end_voting(self) -> bool:
-        status, voting = self.get_current_or_last_voting()
+    async def end_voting(self) -> bool:
+        status, voting = await self.get_current_or_last_voting()
         if status == "now":
-            voting.voting_finish = datetime.now()
-            self.session.merge(voting)
-            self.session.commit()
+            # the cached Voting row is shared, so it is updated in the db only
+            async with self.session_scope() as session:
+                await session.execute(
+                    update(Voting)
+                    .where(Voting.id == voting.id)
+                    .values(voting_finish=datetime.now().date())
+                )
+                await self._notify(session, "voting")
+                await session.commit()
+            self._invalidate_voting_state()
+            # the next voting reads the final results of this one
+            await self.flush_results(voting.id)
             logger.info(f"voting had been ended")
             return True
         else:
@@ -347,44 +1223,90 @@ class DBManager:
 
     # region general methods
 
-    def insert_bot_user(self, user_id: int) -> None:
-        self.session.merge(BotUser(telegram_id=user_id))
-        self.session.commit()
+    async def insert_bot_user(self, user_id: int) -> None:
+        async with self.session_scope() as session:
+            await session.merge(BotUser(telegram_id=user_id))
+            await session.commit()
 
         logger.info(f"bot_user had been inserted {user_id}")
 
-    def is_admin(self, id: int) -> bool:
-        try:
-            self.session.query(BotUser).filter(
-                BotUser.telegram_id == id, BotUser.is_admin == True
-            ).one()
-            return True
-        except NoResultFound:
-            return False
+    async def get_bot_user_ids(self) -> List[int]:
+        async with self.session_scope() as session:
+            return list(await session.scalars(select(BotUser.telegram_id)))
+
+    async def _load_admins(self) -> None:
+        async with self.session_scope() as session:
+            self._admins = set(
+                await session.scalars(
+                    select(BotUser.telegram_id).filter(BotUser.is_admin == True)
+                )
+            )
+
+    async def _refresh_admins(self) -> None:
+        # picks up admins granted outside of this process
+        while True:
+            await asyncio.sleep(config.ADMINS_CACHE_TTL)
+            try:
+                await self._load_admins()
+            except Exception as error:
+                logger.error(f"admins hadnt been refreshed {error}")
+
+    async def is_admin(self, id: int) -> bool:
+        if self._admins is None:
+            await self._load_admins()
+        return id in self._admins
 
     # endregion
 
     # region adding methods
 
-    def add_category(self, name: str) -> bool:
-        self.session.merge(BookCategory(name=name))
-        self.session.commit()
+    async def add_category(self, name: str) -> bool:
+        async with self.session_scope() as session:
+            await session.merge(BookCategory(name=name))
+            await self._notify(session, "catalog")
+            await session.commit()
+        self._invalidate_catalog()
 
         logger.info(f"category had been added {name}")
 
         return True
 
-    def add_book(self, name: str, category: int) -> bool:
-        self.session.merge(Book(name=name, category_id=category))
-        self.session.commit()
+    async def add_book(self, name: str, category: int) -> bool:
+        async with self.session_scope() as session:
+            await session.merge(Book(name=name, category_id=category))
+            await self._notify(session, "catalog")
+            await session.commit()
+        self._invalidate_catalog()
 
         logger.info(f"book had been added {name}")
 
         return True
 
-    def add_admin(self, id: int) -> bool:
-        self.session.merge(BotUser(telegram_id=id, is_admin=True))
-        self.session.commit()
+    async def set_reading_dates(self, start: str, finish: str, book_id: str) -> bool:
+        format_date = lambda date: datetime.strptime(date.strip(), "%d.%m.%Y").date()
+        read_start, read_finish = format_date(start), format_date(finish)
+
+        async with self.session_scope() as session:
+            book = await session.get(Book, int(book_id))
+            if book is None:
+                return False
+            book.read_start = read_start
+            book.read_finish = read_finish
+            await self._notify(session, "catalog")
+            await session.commit()
+        self._invalidate_catalog()
+
+        logger.info(f"reading dates had been set {book_id}: {start}-{finish}")
+
+        return True
+
+    async def add_admin(self, id: int) -> bool:
+        async with self.session_scope() as session:
+            await session.merge(BotUser(telegram_id=id, is_admin=True))
+            await self._notify(session, "admins")
+            await session.commit()
+        if self._admins is not None:
+            self._admins.add(id)
 
         logger.info(f"admin had been added {id}")
 
@@ -393,6 +1315,183 @@ class DBManager:
     # endregion
 
 
+    # region fsm methods
+
+    async def get_fsm_record(
+        self, chat_id: int, user_id: int
+    ) -> Optional[Tuple[Optional[str], dict, Optional[dict]]]:
+        # plain columns, an identity mapped FsmRecord would miss the upserts
+        async with self.session_scope() as session:
+            return (
+                await session.execute(
+                    select(FsmRecord.state, FsmRecord.data, FsmRecord.bucket).where(
+                        FsmRecord.chat_id == chat_id, FsmRecord.user_id == user_id
+                    )
+                )
+            ).one_or_none()
+
+    async def save_fsm_record(
+        self,
+        chat_id: int,
+        user_id: int,
+        state: Optional[str],
+        data: dict,
+        bucket: Optional[dict],
+    ) -> None:
+        async with self.session_scope() as session:
+            if state is None and not data and not bucket:
+                # a finished state leaves nothing to keep
+                await session.execute(
+                    FsmRecord.__table__.delete().where(
+                        FsmRecord.chat_id == chat_id, FsmRecord.user_id == user_id
+                    )
+                )
+            else:
+                statement = insert(FsmRecord).values(
+                    chat_id=chat_id,
+                    user_id=user_id,
+                    state=state,
+                    data=data,
+                    bucket=bucket,
+                    updated_at=func.now(),
+                )
+                await session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[FsmRecord.chat_id, FsmRecord.user_id],
+                        set_={
+                            "state": statement.excluded.state,
+                            "data": statement.excluded.data,
+                            "bucket": statement.excluded.bucket,
+                            "updated_at": statement.excluded.updated_at,
+                        },
+                    )
+                )
+            await session.commit()
+
+    async def delete_stale_fsm_records(self, ttl: int) -> int:
+        async with self.session_scope() as session:
+            result = await session.execute(
+                FsmRecord.__table__.delete().where(
+                    FsmRecord.updated_at
+                    < datetime.now(timezone.utc) - timedelta(seconds=ttl)
+                )
+            )
+            await session.commit()
+
+        if result.rowcount:
+            logger.info(f"stale fsm records had been deleted {result.rowcount}")
+
+        return result.rowcount
+
+    # endregion
+
+
+    # region broadcast methods
+
+    async def create_broadcast(
+        self, kind: str, voting_id: Optional[int], text: str
+    ) -> Optional[int]:
+        """Creates a broadcast to every bot user, None if it exists already.
+
+        A voting gets one broadcast of every kind, however many workers try.
+        """
+        async with self.session_scope() as session:
+            broadcast_id = await session.scalar(
+                insert(Broadcast)
+                .values(kind=kind, voting_id=voting_id, text=text)
+                .on_conflict_do_nothing(
+                    index_elements=[Broadcast.voting_id, Broadcast.kind]
+                )
+                .returning(Broadcast.id)
+            )
+            if broadcast_id is None:
+                return None
+
+            await session.execute(
+                insert(BroadcastDelivery).from_select(
+                    ["broadcast_id", "user_id"],
+                    select(literal(broadcast_id), BotUser.telegram_id),
+                )
+            )
+            # for the sending worker
+            await self._notify(session, "broadcasts")
+            await session.commit()
+
+        logger.info(f"broadcast had been created {kind} id={broadcast_id}")
+
+        return broadcast_id
+
+    async def get_broadcast(self, broadcast_id: int) -> Broadcast:
+        async with self.session_scope() as session:
+            return await session.get(Broadcast, broadcast_id)
+
+    async def get_unfinished_broadcast_ids(self) -> List[int]:
+        async with self.session_scope() as session:
+            return list(
+                await session.scalars(
+                    select(Broadcast.id)
+                    .filter(Broadcast.finished_at == None)
+                    .order_by(Broadcast.id)
+                )
+            )
+
+    async def get_pending_deliveries(self, broadcast_id: int) -> List[int]:
+        async with self.session_scope() as session:
+            return list(
+                await session.scalars(
+                    select(BroadcastDelivery.user_id)
+                    .filter(
+                        BroadcastDelivery.broadcast_id == broadcast_id,
+                        BroadcastDelivery.status == "pending",
+                    )
+                    .order_by(BroadcastDelivery.user_id)
+                )
+            )
+
+    async def save_deliveries(self, broadcast_id: int, statuses: dict[int, str]) -> None:
+        async with self.session_scope() as session:
+            await session.execute(
+                update(BroadcastDelivery),
+                [
+                    {"broadcast_id": broadcast_id, "user_id": user_id, "status": status}
+                    for user_id, status in statuses.items()
+                ],
+            )
+            await session.commit()
+
+    async def finish_broadcast(self, broadcast_id: int) -> None:
+        async with self.session_scope() as session:
+            await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id)
+                .values(finished_at=func.now())
+            )
+            await session.commit()
+
+        logger.info(f"broadcast had been finished id={broadcast_id}")
+
+    @asynccontextmanager
+    async def broadcast_lock(self, broadcast_id: int) -> AsyncIterator[bool]:
+        """Yields whether this process got to send the broadcast.
+
+        The lock lives as long as its connection, a process that dies while
+        sending lets another one resume the broadcast. A broadcast can take
+        minutes, so the connection is a dedicated one in autocommit mode, not
+        a pooled one idle in transaction.
+        """
+        connection = await self._connect_dedicated()
+        try:
+            yield await connection.fetchval(
+                "SELECT pg_try_advisory_lock(hashtext('broadcast'), $1)",
+                broadcast_id,
+            )
+        finally:
+            # closing the session releases the lock
+            await connection.close()
+
+    # endregion
+
+
 if __name__ == "__main__":
     db = DBManager()
-    logger.info(db.get_current_voting())
+    logger.info(asyncio.run(db.get_current_or_last_voting()))
@@ -0,0 +1,65 @@
+"""Imports ballots collected outside of the bot.
+
+    python -m itamliterature.import_votes votes.csv
+    python -m itamliterature.import_votes votes.jsonl --chunk-size 1000
+
+A CSV file needs a header with the user_id, voting_id, r1, r2 and r3
+columns, a JSONL file an object with these keys on every line.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from itamliterature.db import DBManager
+
+
+COLUMNS = ("user_id", "voting_id", "r1", "r2", "r3")
+
+
+def read_csv(file) -> Iterator[Optional[tuple]]:
+    for row in csv.DictReader(file):
+        yield tuple(row.get(column) for column in COLUMNS)
+
+
+def read_jsonl(file) -> Iterator[Optional[tuple]]:
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        yield tuple(row.get(column) for column in COLUMNS)
+
+
+async def main(args: argparse.Namespace) -> int:
+    format = args.format or ("jsonl" if args.path.endswith(".jsonl") else "csv")
+    reader = read_jsonl if format == "jsonl" else read_csv
+
+    db = DBManager()
+    db.engine.echo = False
+    await db.init()
+    try:
+        with open(args.path, newline="", encoding="utf-8") as file:
+            report = await db.import_votes(reader(file), args.chunk_size)
+    finally:
+        await db.close_connection()
+
+    for number, reason in report.skipped:
+        logger.warning(f"row {number} had been skipped: {reason}")
+    logger.info(f"imported {report.imported}, skipped {len(report.skipped)}")
+    return 1 if report.skipped else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imports ballots from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    sys.exit(asyncio.run(main(parser.parse_args())))
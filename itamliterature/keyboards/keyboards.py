@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from itamliterature.models.models import Category
 from itamliterature import config
@@ -18,6 +20,8 @@ button_stopvoting = "📝 Закончить голосование"
 button_addReadingDates = "📅 Добавить даты чтения"
 #endregion
 
+# pure function of its arguments, the markup is shared between messages
+@lru_cache(maxsize=256)
 def get_categories_keyboard(
     current_category_index: int, categories_count: int, callback_prefix: str
 ) -> InlineKeyboardMarkup:
@@ -62,6 +66,19 @@ def get_books_voting_keyboard(categories: list[Category]) -> InlineKeyboardMarku
     )
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+# the categories are listed in the message, the member answers with numbers
+@lru_cache(maxsize=1)
+def get_categories_voting_keyboard() -> InlineKeyboardMarkup:
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                button_cancel,
+                callback_data=f"{config.LITRA_CALLBACK_PREFIX}cancel",
+            )
+        ]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 def get_main_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
     keyboard = [
         [
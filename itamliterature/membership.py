@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.utils import exceptions
+from loguru import logger
+
+from itamliterature import config
+from itamliterature.broadcast import RateLimiter
+
+# get_chat_member calls in flight while warming up
+WARM_UP_CONCURRENCY = 5
+
+
+class MembershipCache:
+    """Remembers who is a member of the club chat.
+
+    Only members can vote, and asking Telegram on every vote attempt costs a
+    round trip and counts against the rate limits. Members are remembered
+    for MEMBERSHIP_CACHE_TTL seconds, users who aren't for the shorter
+    MEMBERSHIP_NEGATIVE_TTL so that joining takes effect soon. chat_member
+    updates, if the bot gets them, replace an entry right away. At most
+    max_size users are remembered, the least recently asked are dropped.
+
+    The warm-up asks Telegram through limiter, pass the broadcaster's so
+    that both stay within one budget.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        ttl: int = config.MEMBERSHIP_CACHE_TTL,
+        negative_ttl: int = config.MEMBERSHIP_NEGATIVE_TTL,
+        max_size: int = config.MEMBERSHIP_CACHE_SIZE,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.limiter = limiter or RateLimiter(
+            config.BROADCAST_RATE, config.BROADCAST_CHAT_INTERVAL
+        )
+        # user id -> (expires at, is member), least recently asked first
+        self._members: OrderedDict[int, Tuple[float, bool]] = OrderedDict()
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    async def is_member(self, user_id: int) -> bool:
+        cached = self._members.get(user_id)
+        if cached is not None and time.monotonic() < cached[0]:
+            self._members.move_to_end(user_id)
+            return cached[1]
+
+        member = await self.bot.get_chat_member(chat_id=self.chat_id, user_id=user_id)
+        return self.set_status(user_id, member.status)
+
+    def set_status(self, user_id: int, status: str) -> bool:
+        is_member = status != "left"
+        ttl = self.ttl if is_member else self.negative_ttl
+        self._members[user_id] = (time.monotonic() + ttl, is_member)
+        self._members.move_to_end(user_id)
+        while len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+        return is_member
+
+    def start_warm_up(self, user_ids: Iterable[int]) -> None:
+        """Looks the users up in the background, a few at a time and no
+        faster than the limiter allows."""
+        self._warm_up_task = asyncio.create_task(self._warm_up(list(user_ids)))
+
+    async def _warm_up(self, user_ids: list[int]) -> None:
+        semaphore = asyncio.Semaphore(WARM_UP_CONCURRENCY)
+
+        async def warm_up(user_id: int) -> None:
+            async with semaphore:
+                await self.limiter.wait(user_id)
+                try:
+                    await self.is_member(user_id)
+                except exceptions.RetryAfter as error:
+                    # holds back the broadcasts sharing the limiter too
+                    self.limiter.pause(error.timeout)
+                    logger.warning(
+                        f"membership of {user_id} hadnt been checked {error}"
+                    )
+                except Exception as error:
+                    logger.warning(
+                        f"membership of {user_id} hadnt been checked {error}"
+                    )
+
+        await asyncio.gather(*(warm_up(user_id) for user_id in user_ids))
+        logger.info(f"membership cache had been warmed up users={len(user_ids)}")
+
+    def close(self) -> None:
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
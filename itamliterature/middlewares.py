@@ -0,0 +1,29 @@
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from itamliterature.db import DBManager
+
+
+class DBSessionMiddleware(BaseMiddleware):
+    """Opens a DB update scope before every update and closes it after.
+
+    All DBManager calls made while the update is handled, filters included,
+    share that one short session instead of a process wide one. It holds a
+    connection only while a call runs.
+    """
+
+    def __init__(self, db: DBManager):
+        super().__init__()
+        self.db = db
+
+    async def on_pre_process_update(self, update: types.Update, data: dict) -> None:
+        scope = self.db.update_scope()
+        await scope.__aenter__()
+        data["db_session_scope"] = scope
+
+    async def on_post_process_update(
+        self, update: types.Update, result: list, data: dict
+    ) -> None:
+        scope = data.pop("db_session_scope", None)
+        if scope is not None:
+            await scope.__aexit__(None, None, None)
@@ -0,0 +1,26 @@
+-- Indexes for the filters DBManager runs on every update.
+-- book.category_id is already led by the (category_id, ordering) unique
+-- constraint and voting.voting_finish by its unique constraint.
+
+-- get_weighted_ranks / get_user_vote: the ballot columns ride along so the
+-- GROUP BY is answered by an index only scan
+CREATE INDEX IF NOT EXISTS ix_vote_book_voting_ballot
+    ON vote_book (voting_id, first_book_id, second_book_id, third_book_id);
+
+CREATE INDEX IF NOT EXISTS ix_vote_category_voting_ballot
+    ON vote_category (voting_id, first_category_id, second_category_id, third_category_id);
+
+-- now read / already read books
+CREATE INDEX IF NOT EXISTS ix_book_read_finish
+    ON book (read_finish) WHERE read_finish IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_book_read_start
+    ON book (read_start) WHERE read_start IS NOT NULL;
+
+-- the latest category voting before a book voting
+CREATE INDEX IF NOT EXISTS ix_voting_type_id
+    ON voting (voting_type, id);
+
+-- _load_admins
+CREATE INDEX IF NOT EXISTS ix_bot_user_admin
+    ON bot_user (telegram_id) WHERE is_admin;
@@ -0,0 +1,6 @@
+-- checksums of the loaded seed files, see DBManager._load_seed
+CREATE TABLE IF NOT EXISTS seed_meta (
+    name text PRIMARY KEY,
+    checksum text NOT NULL,
+    loaded_at timestamptz NOT NULL DEFAULT now()
+);
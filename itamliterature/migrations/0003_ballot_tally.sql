@@ -0,0 +1,28 @@
+-- ballot_tally is maintained by DBManager.insert_vote, this fills it with
+-- the ballots cast before it existed
+CREATE TABLE IF NOT EXISTS ballot_tally (
+    voting_id integer NOT NULL REFERENCES voting (id),
+    first_id integer NOT NULL,
+    second_id integer NOT NULL,
+    third_id integer NOT NULL,
+    count integer NOT NULL,
+    PRIMARY KEY (voting_id, first_id, second_id, third_id)
+);
+
+INSERT INTO ballot_tally (voting_id, first_id, second_id, third_id, count)
+SELECT voting_id, first_category_id, second_category_id, third_category_id, count(*)
+FROM vote_category
+WHERE first_category_id IS NOT NULL
+    AND second_category_id IS NOT NULL
+    AND third_category_id IS NOT NULL
+GROUP BY voting_id, first_category_id, second_category_id, third_category_id
+ON CONFLICT DO NOTHING;
+
+INSERT INTO ballot_tally (voting_id, first_id, second_id, third_id, count)
+SELECT voting_id, first_book_id, second_book_id, third_book_id, count(*)
+FROM vote_book
+WHERE first_book_id IS NOT NULL
+    AND second_book_id IS NOT NULL
+    AND third_book_id IS NOT NULL
+GROUP BY voting_id, first_book_id, second_book_id, third_book_id
+ON CONFLICT DO NOTHING;
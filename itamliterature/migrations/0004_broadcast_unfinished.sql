@@ -0,0 +1,4 @@
+-- Broadcaster._watch looks for unfinished broadcasts every few minutes,
+-- almost every broadcast is finished
+CREATE INDEX IF NOT EXISTS ix_broadcast_unfinished
+    ON broadcast (id) WHERE finished_at IS NULL;
@@ -0,0 +1,6 @@
+-- Results are ranked from ballot_tally, the ballot tables are read by
+-- their primary keys only. The covering indexes of 0001 served the GROUP BY
+-- of the backfill in 0003, which has run by now
+DROP INDEX IF EXISTS ix_vote_book_voting_ballot;
+
+DROP INDEX IF EXISTS ix_vote_category_voting_ballot;
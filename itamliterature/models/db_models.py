@@ -12,6 +12,7 @@ from sqlalchemy import (
     Identity,
     Boolean,
     BigInteger,
+    JSON,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -79,6 +80,37 @@ class VoteResults(Base):
     third_place_id = Column(Integer)
 
 
+class VotingSnapshot(Base):
+    __tablename__ = "voting_snapshot"
+
+    voting_id = Column(Integer, ForeignKey("voting.id"), primary_key=True)
+    # bumped with every ballot change of the voting
+    ballot_version = Column(Integer, nullable=False, default=0)
+    # ballot_version the rankings had been computed for
+    ranks_version = Column(Integer, nullable=False, default=0)
+    votes_count = Column(Integer, nullable=False, default=0)
+    # [{"category_id": id or null for all candidates, "ranks": [[id, ...], ...]}]
+    rankings = Column(JSON, nullable=False, default=list)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class BallotTally(Base):
+    __tablename__ = "ballot_tally"
+
+    # number of ballots of a voting with the same first, second and third
+    # choice, book or category ids depending on the voting type
+    voting_id = Column(Integer, ForeignKey("voting.id"), primary_key=True)
+    first_id = Column(Integer, primary_key=True)
+    second_id = Column(Integer, primary_key=True)
+    third_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class VotingType(Base):
     __tablename__ = "voting_type"
 
@@ -122,3 +154,41 @@ class VoteCategory(Base):
         ForeignKeyConstraint(["voting_id"], ["voting.id"]),
         ForeignKeyConstraint(["user_id"], ["bot_user.telegram_id"]),
     )
+
+
+class FsmRecord(Base):
+    __tablename__ = "fsm_record"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(JSON, nullable=False, default=dict)
+    bucket = Column(JSON, nullable=True)
+    # abandoned records are deleted by PostgresStorage
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcast"
+
+    id = Column(Integer, Identity(start=1), primary_key=True)
+    # "voting_start", "voting_deadline" or "voting_results"
+    kind = Column(String, nullable=False)
+    voting_id = Column(Integer, ForeignKey("voting.id"), nullable=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (UniqueConstraint("voting_id", "kind"),)
+
+
+class BroadcastDelivery(Base):
+    __tablename__ = "broadcast_delivery"
+
+    broadcast_id = Column(Integer, ForeignKey("broadcast.id"), primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    # "pending", "sent" or "failed"
+    status = Column(String, nullable=False, default="pending")
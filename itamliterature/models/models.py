@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from typing import Optional, Union, List
-from datetime import datetime
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Optional, Union, List, Mapping
+from datetime import datetime, date, time
 from itamliterature.models import db_models
 from itamliterature import config
 from enum import Enum
@@ -73,6 +74,88 @@ class Category:
         self.name = category.name
 
 
+@dataclass(frozen=True)
+class Catalog:
+    """Immutable snapshot of all categories and books.
+
+    Categories keep their books in catalog order. book_rows holds the db rows
+    for callers that render the raw book name (title and author).
+    """
+
+    version: int
+    categories: tuple[Category, ...]
+    books: tuple[Book, ...]
+    categories_by_id: Mapping[int, Category]
+    books_by_id: Mapping[int, Book]
+    book_rows: Mapping[int, db_models.Book]
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        categories: List[db_models.BookCategory],
+        books: List[db_models.Book],
+    ) -> "Catalog":
+        snapshot_categories = tuple(Category(category) for category in categories)
+        snapshot_books = tuple(Book(book) for book in books)
+        books_by_category: dict[int, list[Book]] = {}
+        for book in snapshot_books:
+            books_by_category.setdefault(book.category_id, []).append(book)
+        for category in snapshot_categories:
+            category.books = books_by_category.get(category.id, [])
+
+        return cls(
+            version=version,
+            categories=snapshot_categories,
+            books=snapshot_books,
+            categories_by_id=MappingProxyType(
+                {category.id: category for category in snapshot_categories}
+            ),
+            books_by_id=MappingProxyType({book.id: book for book in snapshot_books}),
+            book_rows=MappingProxyType({book.id: book for book in books}),
+        )
+
+
+@dataclass(frozen=True)
+class VotingState:
+    """Current or last voting resolved at one moment.
+
+    status is "now", "last" or "no_voting" like in
+    DBManager.get_current_or_last_voting. last_finished is the latest voting
+    that is already over. The state stays valid until expires_at, the start of
+    the current voting's finish day, or forever when nothing can finish.
+    """
+
+    version: int
+    status: str
+    voting: Optional[db_models.Voting]
+    last_finished: Optional[db_models.Voting]
+    expires_at: Optional[datetime]
+
+    @classmethod
+    def build(
+        cls, version: int, votings: List[db_models.Voting], now: datetime
+    ) -> "VotingState":
+        # a Date column compared with a timestamp is compared at midnight
+        finish_at = lambda voting: datetime.combine(voting.voting_finish, time.min)
+
+        ongoing = [voting for voting in votings if finish_at(voting) > now]
+        finished = [voting for voting in votings if finish_at(voting) < now]
+        last_finished = max(finished, key=lambda voting: voting.id, default=None)
+        expires_at = min((finish_at(voting) for voting in ongoing), default=None)
+
+        if not votings:
+            return cls(version, "no_voting", None, last_finished, expires_at)
+        if ongoing:
+            current = max(ongoing, key=lambda voting: voting.voting_finish)
+            return cls(version, "now", current, last_finished, expires_at)
+        last = max(votings, key=lambda voting: voting.voting_finish)
+        return cls(version, "last", last, last_finished, expires_at)
+
+    def is_expired(self, now: datetime) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+
 class Voting(Enum):
     Category = 1
     Book = 2
@@ -87,6 +170,13 @@ class Vote:
         self.first_vote, self.second_vote, self.third_vote = votes
 
 
+@dataclass
+class VotesImport:
+    imported: int = 0
+    # (row number, reason) of the rows that were left out
+    skipped: List[tuple[int, str]] = field(default_factory=list)
+
+
 class VoteResult:
     first_place: int
     second_place: int
@@ -0,0 +1,148 @@
+import asyncio
+import copy
+import time
+from typing import Dict, Optional, Tuple
+
+from aiogram.dispatcher.storage import BaseStorage
+from loguru import logger
+
+from itamliterature import config
+from itamliterature.db import DBManager
+
+# seconds between two sweeps of abandoned states
+EVICT_INTERVAL = 600
+
+
+class PostgresStorage(BaseStorage):
+    """FSM storage kept in the fsm_record table of the bot database.
+
+    Several bot workers can share it, a user who started entering a vote on
+    one worker continues on any other. Reads go through a write-through cache
+    that is trusted for FSM_CACHE_TTL seconds, so the state check the
+    dispatcher makes for every update rarely reaches the database. States
+    untouched for FSM_STATE_TTL seconds are deleted in the background.
+    """
+
+    def __init__(
+        self,
+        db: DBManager,
+        cache_ttl: int = config.FSM_CACHE_TTL,
+        state_ttl: int = config.FSM_STATE_TTL,
+    ):
+        self.db = db
+        self.cache_ttl = cache_ttl
+        self.state_ttl = state_ttl
+        # (chat, user) -> (cached at, state, data, bucket)
+        self._cache: Dict[
+            Tuple[int, int], Tuple[float, Optional[str], dict, Optional[dict]]
+        ] = {}
+        self._evict_task: Optional[asyncio.Task] = None
+
+    async def _get_record(
+        self, chat: int, user: int
+    ) -> Tuple[Optional[str], dict, Optional[dict]]:
+        if self._evict_task is None:
+            self._evict_task = asyncio.create_task(self._evict())
+
+        cached = self._cache.get((chat, user))
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1:]
+
+        # a missing row is cached too, most updates come from users in no state
+        record = await self.db.get_fsm_record(chat, user)
+        state, data, bucket = record if record is not None else (None, {}, None)
+        self._cache[(chat, user)] = (time.monotonic(), state, data, bucket)
+        return state, data, bucket
+
+    async def _save_record(
+        self,
+        chat: int,
+        user: int,
+        state: Optional[str],
+        data: dict,
+        bucket: Optional[dict],
+    ) -> None:
+        # the cache is dropped first, a failed write must not leave it ahead
+        self._cache.pop((chat, user), None)
+        await self.db.save_fsm_record(chat, user, state, data, bucket)
+        self._cache[(chat, user)] = (time.monotonic(), state, data, bucket)
+
+    async def _evict(self) -> None:
+        while True:
+            await asyncio.sleep(EVICT_INTERVAL)
+            now = time.monotonic()
+            for key, cached in list(self._cache.items()):
+                if now - cached[0] >= self.cache_ttl:
+                    del self._cache[key]
+            try:
+                await self.db.delete_stale_fsm_records(self.state_ttl)
+            except Exception as error:
+                logger.error(f"stale fsm records hadnt been deleted {error}")
+
+    def _address(self, chat, user) -> Tuple[int, int]:
+        chat, user = self.check_address(chat=chat, user=user)
+        return int(chat), int(user)
+
+    async def close(self) -> None:
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+        self._cache.clear()
+
+    async def wait_closed(self) -> None:
+        if self._evict_task is not None:
+            await asyncio.gather(self._evict_task, return_exceptions=True)
+            self._evict_task = None
+
+    async def get_state(self, *, chat=None, user=None, default=None) -> Optional[str]:
+        state, _, _ = await self._get_record(*self._address(chat, user))
+        return state if state is not None else self.resolve_state(default)
+
+    async def get_data(self, *, chat=None, user=None, default=None) -> Dict:
+        _, data, _ = await self._get_record(*self._address(chat, user))
+        return copy.deepcopy(data) if data else copy.deepcopy(default or {})
+
+    async def set_state(self, *, chat=None, user=None, state=None) -> None:
+        chat, user = self._address(chat, user)
+        _, data, bucket = await self._get_record(chat, user)
+        await self._save_record(chat, user, self.resolve_state(state), data, bucket)
+
+    async def set_data(self, *, chat=None, user=None, data: Dict = None) -> None:
+        chat, user = self._address(chat, user)
+        state, _, bucket = await self._get_record(chat, user)
+        await self._save_record(chat, user, state, copy.deepcopy(data or {}), bucket)
+
+    async def update_data(
+        self, *, chat=None, user=None, data: Dict = None, **kwargs
+    ) -> None:
+        chat, user = self._address(chat, user)
+        state, old_data, bucket = await self._get_record(chat, user)
+        new_data = copy.deepcopy(old_data)
+        new_data.update(copy.deepcopy(data or {}), **kwargs)
+        await self._save_record(chat, user, state, new_data, bucket)
+
+    async def reset_state(self, *, chat=None, user=None, with_data=True) -> None:
+        # one write instead of the set_state and set_data of BaseStorage
+        chat, user = self._address(chat, user)
+        _, data, bucket = await self._get_record(chat, user)
+        await self._save_record(chat, user, None, {} if with_data else data, bucket)
+
+    def has_bucket(self) -> bool:
+        return True
+
+    async def get_bucket(self, *, chat=None, user=None, default=None) -> Dict:
+        _, _, bucket = await self._get_record(*self._address(chat, user))
+        return copy.deepcopy(bucket) if bucket else copy.deepcopy(default or {})
+
+    async def set_bucket(self, *, chat=None, user=None, bucket: Dict = None) -> None:
+        chat, user = self._address(chat, user)
+        state, data, _ = await self._get_record(chat, user)
+        await self._save_record(chat, user, state, data, copy.deepcopy(bucket or {}))
+
+    async def update_bucket(
+        self, *, chat=None, user=None, bucket: Dict = None, **kwargs
+    ) -> None:
+        chat, user = self._address(chat, user)
+        state, data, old_bucket = await self._get_record(chat, user)
+        new_bucket = copy.deepcopy(old_bucket or {})
+        new_bucket.update(copy.deepcopy(bucket or {}), **kwargs)
+        await self._save_record(chat, user, state, data, new_bucket)
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import signal
+import sys
+from typing import Awaitable, Callable, Optional
+
+import aiohttp
+from aiogram import Bot, types
+from aiogram.bot import api
+from aiogram.utils.payload import prepare_arg
+from aiohttp import web
+from loguru import logger
+
+from itamliterature import config
+from itamliterature.utils import utilities
+from itamliterature.webhook import SECRET_HEADER
+
+# updates sent to a worker in one request at most
+BATCH_SIZE = 100
+# seconds before a worker that died, or didn't answer, is tried again
+RETRY_DELAY = 1
+
+
+class Supervisor:
+    """Receives updates and fans them out to BOT_WORKERS worker processes.
+
+    Updates come from long polling, or from the webhook in webhook mode. A
+    user's updates always go to the same worker and in the order they came,
+    so the worker handles them one after another like a single bot would.
+    Workers are `python -m itamliterature` processes in worker mode, they
+    get their updates over HTTP on 127.0.0.1 and are restarted if they die.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int,
+        on_startup: Callable[[], Awaitable[None]],
+    ):
+        self.bot = bot
+        self.workers = workers
+        self.on_startup = on_startup
+        self._queues = [asyncio.Queue() for _ in range(workers)]
+        self._processes: list[Optional[asyncio.subprocess.Process]] = [None] * workers
+        self._stopping = asyncio.Event()
+
+    def run(self) -> None:
+        asyncio.run(self.serve())
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stopping.set)
+
+        # workers find the schema migrated and don't race to migrate it
+        await self.on_startup()
+
+        tasks = [
+            asyncio.create_task(coroutine)
+            for index in range(self.workers)
+            for coroutine in (self._keep_worker(index), self._forward(index))
+        ]
+        if config.BOT_MODE == "webhook":
+            runner = await self._serve_webhook()
+            await self._stopping.wait()
+            await runner.cleanup()
+        else:
+            await self.bot.delete_webhook(drop_pending_updates=True)
+            polling = asyncio.create_task(self._poll())
+            await self._stopping.wait()
+            polling.cancel()
+
+        # updates received already are handed to the workers before they stop
+        await asyncio.wait(
+            [asyncio.create_task(queue.join()) for queue in self._queues], timeout=30
+        )
+        for task in tasks:
+            task.cancel()
+        for process in self._processes:
+            if process is not None and process.returncode is None:
+                process.terminate()
+        await asyncio.gather(
+            *(process.wait() for process in self._processes if process is not None)
+        )
+        session = await self.bot.get_session()
+        await session.close()
+
+    def dispatch(self, update: dict) -> None:
+        shard = utilities.update_user_id(update) % self.workers
+        self._queues[shard].put_nowait(update)
+
+    async def _poll(self) -> None:
+        payload = {
+            "timeout": 20,
+            "allowed_updates": prepare_arg(types.AllowedUpdates.all()),
+        }
+        while True:
+            try:
+                updates = await self.bot.request(api.Methods.GET_UPDATES, payload)
+            except Exception as error:
+                logger.error(f"updates hadnt been received {error}")
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+
+            for update in updates:
+                payload["offset"] = update["update_id"] + 1
+                self.dispatch(update)
+
+    async def _serve_webhook(self) -> web.AppRunner:
+        async def handle(request: web.Request) -> web.Response:
+            if config.WEBHOOK_SECRET and (
+                request.headers.get(SECRET_HEADER) != config.WEBHOOK_SECRET
+            ):
+                return web.Response(status=403)
+            self.dispatch(await request.json())
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_post(config.WEBHOOK_PATH, handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, config.WEBAPP_HOST, config.WEBAPP_PORT).start()
+
+        await self.bot.set_webhook(
+            config.WEBHOOK_HOST.rstrip("/") + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=types.AllowedUpdates.all(),
+            drop_pending_updates=True,
+        )
+        logger.info(f"webhook is served on {config.WEBAPP_HOST}:{config.WEBAPP_PORT}")
+        return runner
+
+    async def _keep_worker(self, index: int) -> None:
+        env = dict(
+            os.environ,
+            BOT_MODE="worker",
+            WORKER_INDEX=str(index),
+            WEBAPP_HOST="127.0.0.1",
+            WEBAPP_PORT=str(config.WORKER_PORT + index),
+        )
+        while True:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "itamliterature", env=env
+            )
+            self._processes[index] = process
+            logger.info(f"worker {index} had been started pid={process.pid}")
+
+            returncode = await process.wait()
+            logger.error(f"worker {index} had exited code={returncode}")
+            await asyncio.sleep(RETRY_DELAY)
+
+    async def _forward(self, index: int) -> None:
+        url = f"http://127.0.0.1:{config.WORKER_PORT + index}{config.WEBHOOK_PATH}"
+        headers = (
+            {SECRET_HEADER: config.WEBHOOK_SECRET} if config.WEBHOOK_SECRET else {}
+        )
+        queue = self._queues[index]
+
+        async with aiohttp.ClientSession(headers=headers) as session:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty() and len(batch) < BATCH_SIZE:
+                    batch.append(queue.get_nowait())
+
+                # a batch is retried until the worker takes it, later updates
+                # of its users must not overtake it
+                while True:
+                    try:
+                        async with session.post(url, json=batch) as response:
+                            response.raise_for_status()
+                        break
+                    except aiohttp.ClientError as error:
+                        logger.warning(f"worker {index} hadnt taken updates {error}")
+                        await asyncio.sleep(RETRY_DELAY)
+
+                for _ in batch:
+                    queue.task_done()
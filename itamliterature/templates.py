@@ -1,4 +1,5 @@
 import re
+from collections import OrderedDict
 
 import jinja2
 
@@ -9,11 +10,47 @@ def render_template(template_name: str, data: dict | None = None) -> str:
     if data is None:
         data = {}
     template = _get_template_env().get_template(template_name)
-    rendered = template.render(**data).replace("\n", " ")
-    rendered = rendered.replace("<br>", "\n")
-    rendered = re.sub(" +", " ", rendered).replace(" .", ".").replace(" ,", ",")
-    rendered = "\n".join(line.strip() for line in rendered.split("\n"))
-    rendered = rendered.replace("{FOURPACES}", "    ")
+    return normalize_whitespace(template.render(**data))
+
+
+_SPACE_RUNS = re.compile(" {2,}")
+
+
+def normalize_whitespace(rendered: str) -> str:
+    """Source newlines and spaces collapse into one space, <br> becomes a
+    line break, a space before "." or "," is dropped and every line is
+    stripped. {FOURPACES} is an indent that survives all of that.
+    """
+    rendered = rendered.replace("\n", " ")
+    if "  " in rendered:
+        rendered = _SPACE_RUNS.sub(" ", rendered)
+    rendered = rendered.replace(" .", ".").replace(" ,", ",")
+    # no newlines are left, so splitting on <br> gives the lines directly
+    rendered = "\n".join(map(str.strip, rendered.split("<br>")))
+    return rendered.replace("{FOURPACES}", "    ")
+
+
+_rendered: OrderedDict[tuple, str] = OrderedDict()
+
+
+def render_template_cached(
+    template_name: str, key: tuple = (), data: dict | None = None
+) -> str:
+    """render_template memoized on the template name and key.
+
+    key must cover everything data depends on, e.g. the catalog version
+    and the page index. Least recently used pages are evicted first.
+    """
+    cache_key = (template_name, *key)
+    rendered = _rendered.get(cache_key)
+    if rendered is not None:
+        _rendered.move_to_end(cache_key)
+        return rendered
+
+    rendered = render_template(template_name, data)
+    _rendered[cache_key] = rendered
+    if len(_rendered) > config.RENDER_CACHE_SIZE:
+        _rendered.popitem(last=False)
     return rendered
 
 
@@ -31,5 +68,6 @@ def _get_template_env():
 
     return _get_template_env.template_env
 
-if __name__ == '__main__':
-    print(render_template('start.j2'))
\ No newline at end of file
+
+if __name__ == "__main__":
+    print(render_template("start.j2"))
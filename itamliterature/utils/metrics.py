@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Timer:
+    """Aggregated durations (in seconds) of one measured operation."""
+
+    name: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+_timers: dict[str, Timer] = {}
+
+
+def timer(name: str) -> Timer:
+    if name not in _timers:
+        _timers[name] = Timer(name)
+    return _timers[name]
+
+
+def get_timers() -> list[Timer]:
+    return sorted(_timers.values(), key=lambda timer: timer.name)
@@ -9,6 +9,13 @@ __contact__ = "http://omgitsmgp.com/"
 
 from collections import defaultdict
 
+try:
+    import numpy as np
+except ImportError:  # without numpy the matrix engine falls back to lists
+    np = None
+
+ENGINES = ("dict", "matrix")
+
 
 def _add_remaining_ranks(d, candidate, remaining_ranks, weight):
     for remaining_rank in remaining_ranks:
@@ -100,7 +107,140 @@ def _rank_p(candidates, p):
     return [candidate_wins[num_wins] for num_wins in sorted_wins]
 
 
-def compute_ranks(candidates, weighted_ranks):
+def _compute_p_matrix(d):
+    """Computes the p array from a dense d matrix.
+
+    This is the widest path variant of Floyd-Warshall: every step relaxes the
+    whole matrix through one intermediate candidate at once.
+    """
+    size = len(d)
+    if np is not None:
+        d = np.array(d, dtype=np.int64).reshape(size, size)
+        p = np.where(d > d.T, d, 0)
+        for k in range(size):
+            np.maximum(p, np.minimum(p[:, k, np.newaxis], p[np.newaxis, k, :]), out=p)
+        np.fill_diagonal(p, 0)
+        return p
+
+    p = [
+        [d[i][j] if d[i][j] > d[j][i] else 0 for j in range(size)]
+        for i in range(size)
+    ]
+    for k in range(size):
+        p_k = p[k]
+        for i in range(size):
+            p_ik = p[i][k]
+            if p_ik:
+                p[i] = [max(p_ij, min(p_ik, p_kj)) for p_ij, p_kj in zip(p[i], p_k)]
+    for i in range(size):
+        p[i][i] = 0
+    return p
+
+
+def _count_wins(p):
+    """Counts for every row of a dense p matrix how many rows it beats."""
+    if np is not None and isinstance(p, np.ndarray):
+        return (p > p.T).sum(axis=1).tolist()
+    return [
+        sum(1 for j, p_ij in enumerate(p_i) if p_ij > p[j][i])
+        for i, p_i in enumerate(p)
+    ]
+
+
+class PairwiseMatrix:
+    """Dense d matrix of one election that is updated ballot by ballot.
+
+    Only candidates that appear on some ballot get a row. Every candidate
+    nobody ranked sits in the bottom tie group of every completed ballot, so
+    together they behave like a single bottom tier candidate that is preferred
+    to nobody. The matrix keeps that tier as one extra node and never builds
+    the per-ballot rest groups: rest[i] counts how often candidate i was ranked
+    above the unranked part of a ballot, and d holds the pairwise counts minus
+    the candidates each of those ballots did rank.
+
+    add_ballot and remove_ballot apply only the delta of a single ballot, so
+    compute_ranks reruns just the strongest path and ranking steps. The result
+    is the same as compute_ranks over all ballots added so far.
+    """
+
+    def __init__(self, candidates, weighted_ranks=()):
+        self.candidates = list(candidates)
+        self._candidates = set(self.candidates)
+        self._index = {}
+        self._d = []
+        self._rest = []
+        self.ballots_count = 0
+        for ranks, weight in weighted_ranks:
+            self.add_ballot(ranks, weight)
+
+    def _row(self, candidate):
+        row = self._index.get(candidate)
+        if row is None:
+            # the candidate leaves the bottom tier, which has no stored d
+            # entries, so it starts with an empty row and column
+            row = len(self._d)
+            self._index[candidate] = row
+            for d_row in self._d:
+                d_row.append(0)
+            self._d.append([0] * (row + 1))
+            self._rest.append(0)
+        return row
+
+    def add_ballot(self, ranks, weight=1):
+        self.ballots_count += weight
+        flatten_ranks = list(itertools.chain(*ranks))
+        rows = [
+            [self._row(c) for c in rank if c in self._candidates] for rank in ranks
+        ]
+        ranked = {row for rank in rows for row in rank}
+        # same completion rule as _fill_missed_candidates
+        has_rest = len(flatten_ranks) != len(self.candidates) and len(ranked) < len(
+            self._candidates
+        )
+        for i, rank in enumerate(rows):
+            remaining_ranks = rows[(i + 1) :]
+            for row in rank:
+                d_row = self._d[row]
+                for remaining_rank in remaining_ranks:
+                    for column in remaining_rank:
+                        d_row[column] += weight
+                if has_rest:
+                    self._rest[row] += weight
+                    for column in ranked:
+                        d_row[column] -= weight
+
+    def remove_ballot(self, ranks, weight=1):
+        self.add_ballot(ranks, -weight)
+
+    def compute_ranks(self):
+        size = len(self._d)
+        unranked = len(self._candidates) - size
+        d = [
+            [d_ij + rest_i for d_ij in d_i] + ([rest_i] if unranked else [])
+            for d_i, rest_i in zip(self._d, self._rest)
+        ]
+        if unranked:
+            d.append([0] * (size + 1))
+        p = _compute_p_matrix(d)
+        wins = _count_wins(p)
+
+        candidate_wins = defaultdict(list)
+        for candidate in self.candidates:
+            row = self._index.get(candidate)
+            if row is None:
+                num_wins = 0
+            elif unranked and p[row][size] > 0:
+                # beating the bottom tier node means beating each of its members
+                num_wins = wins[row] - 1 + unranked
+            else:
+                num_wins = wins[row]
+            candidate_wins[num_wins].append(candidate)
+
+        sorted_wins = sorted(candidate_wins.keys(), reverse=True)
+        return [candidate_wins[num_wins] for num_wins in sorted_wins]
+
+
+def compute_ranks(candidates, weighted_ranks, engine="dict"):
     """Returns the candidates ranked by the Schulze method.
 
     See http://en.wikipedia.org/wiki/Schulze_method for details.
@@ -113,7 +253,17 @@ def compute_ranks(candidates, weighted_ranks):
     can express ties. For example, [[a, b], [c], [d, e]] represents a = b > c > d = e.
     The second element, weight, is typically the number of voters that chose
     this ranking.
+
+    Parameter engine selects the implementation: "dict" keeps d and p in
+    tuple-keyed dicts, "matrix" keeps them in dense integer arrays and runs
+    the strongest path step vectorized (with numpy when it is installed).
+    Both engines return the same ranking.
     """
+    if engine == "matrix":
+        return PairwiseMatrix(candidates, weighted_ranks).compute_ranks()
+    if engine != "dict":
+        raise ValueError(f"unknown schulze engine {engine!r}, expected one of {ENGINES}")
+
     d = _compute_d(weighted_ranks, candidates)
     p = _compute_p(d, candidates)
     return _rank_p(candidates, p)
@@ -1,20 +1,20 @@
-from collections import Counter
 from itamliterature.models.models import Vote
 
-def data_for_shulze(votes: list[Vote]) -> list[tuple[Vote, int]]:
-    temp_dict = Counter([(
-        vote.first_vote,
-        vote.second_vote,
-        vote.third_vote
-    ) for vote in votes])
-    
-    result = []
-    
+def ranks_from_vote(vote: Vote) -> list[list[int]]:
+    return [[vote.first_vote], [vote.second_vote], [vote.third_vote]]
 
-    for vote, counter in temp_dict.items():
-        print(type(vote), type(counter))
-        vote = list(map(lambda vote: [vote], vote))
-        result.append((vote, counter))
-    
-    return result
-    
\ No newline at end of file
+def split_sql(script: str) -> list[str]:
+    lines = [line for line in script.split('\n') if not line.strip().startswith('--')]
+    return [query.strip() for query in '\n'.join(lines).split(';') if query.strip()]
+
+def update_user_id(update: dict) -> int:
+    # the user an update comes from, the chat for updates without one
+    for key, value in update.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        if key == 'chat_member':
+            # belongs to the member, not to the admin who changed it
+            return value['new_chat_member']['user']['id']
+        sender = value.get('from') or value.get('user') or value.get('chat') or {}
+        return sender.get('id', 0)
+    return 0
@@ -0,0 +1,111 @@
+import asyncio
+import functools
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot, Dispatcher, types
+from aiohttp import web
+from loguru import logger
+
+from itamliterature import config
+from itamliterature.utils import utilities
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Serves Telegram updates over HTTP.
+
+    Every update is acknowledged as soon as it is parsed and handled in a
+    task of its own, so a slow handler neither delays the reply to Telegram
+    nor the updates behind it. Updates of one user are still handled in the
+    order they came in.
+
+    A worker started by the supervisor serves the same endpoint on its own
+    port and gets lists of updates instead of single ones. It leaves the
+    webhook alone, the supervisor receives the updates from Telegram.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        on_startup: Callable[[Dispatcher], Awaitable[None]],
+        on_shutdown: Callable[[Dispatcher], Awaitable[None]],
+        set_webhook: bool = True,
+    ):
+        self.dp = dp
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        self.set_webhook = set_webhook
+        self._tasks: set[asyncio.Task] = set()
+        # the last task of every user with updates in flight
+        self._user_tasks: dict[int, asyncio.Task] = {}
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(config.WEBHOOK_PATH, self.handle)
+        app.on_startup.append(self._startup)
+        app.on_shutdown.append(self._shutdown)
+        return app
+
+    def run(self) -> None:
+        web.run_app(
+            self.make_app(),
+            host=config.WEBAPP_HOST,
+            port=config.WEBAPP_PORT,
+            print=None,
+        )
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if config.WEBHOOK_SECRET and (
+            request.headers.get(SECRET_HEADER) != config.WEBHOOK_SECRET
+        ):
+            return web.Response(status=403)
+
+        updates = await request.json()
+        Bot.set_current(self.dp.bot)
+        Dispatcher.set_current(self.dp)
+
+        for update in updates if isinstance(updates, list) else [updates]:
+            user_id = utilities.update_user_id(update)
+            task = asyncio.create_task(
+                self._process(types.Update(**update), self._user_tasks.get(user_id))
+            )
+            self._user_tasks[user_id] = task
+            self._tasks.add(task)
+            task.add_done_callback(functools.partial(self._task_done, user_id))
+        return web.Response()
+
+    async def _process(
+        self, update: types.Update, previous: Optional[asyncio.Task]
+    ) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        await self.dp.process_update(update)
+
+    def _task_done(self, user_id: int, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._user_tasks.get(user_id) is task:
+            del self._user_tasks[user_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("update hadn't been handled")
+
+    async def _startup(self, app: web.Application) -> None:
+        await self.on_startup(self.dp)
+        if self.set_webhook:
+            await self.dp.bot.set_webhook(
+                config.WEBHOOK_HOST.rstrip("/") + config.WEBHOOK_PATH,
+                secret_token=config.WEBHOOK_SECRET or None,
+                allowed_updates=types.AllowedUpdates.all(),
+                drop_pending_updates=True,
+            )
+        logger.info(f"webhook is served on {config.WEBAPP_HOST}:{config.WEBAPP_PORT}")
+
+    async def _shutdown(self, app: web.Application) -> None:
+        # updates that were acknowledged already are handled to the end
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=30)
+        await self.on_shutdown(self.dp)
+        await self.dp.storage.close()
+        await self.dp.storage.wait_closed()
+        session = await self.dp.bot.get_session()
+        await session.close()
@@ -0,0 +1,107 @@
+"""Compares the old multi-pass whitespace cleanup of render_template with
+templates.normalize_whitespace on every file in itamliterature/templates.
+
+    python scripts/bench_templates.py [--number 2000]
+
+Every template is rendered once with sample data, then both cleanups run on
+the same Jinja output. Exits non-zero if any output differs.
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from datetime import date
+from types import SimpleNamespace
+
+sys.path.insert(0, ".")
+
+from itamliterature import config  # noqa: E402
+from itamliterature.templates import (
+    _get_template_env,
+    normalize_whitespace,
+)  # noqa: E402
+from itamliterature.utils.metrics import Timer  # noqa: E402
+
+
+def old_normalize_whitespace(rendered: str) -> str:
+    rendered = rendered.replace("\n", " ")
+    rendered = rendered.replace("<br>", "\n")
+    rendered = re.sub(" +", " ", rendered).replace(" .", ".").replace(" ,", ",")
+    rendered = "\n".join(line.strip() for line in rendered.split("\n"))
+    rendered = rendered.replace("{FOURPACES}", "    ")
+    return rendered
+
+
+def sample_data() -> dict:
+    books = [
+        SimpleNamespace(
+            id=index,
+            name=f"Книга {index}",
+            author="Автор",
+            read_start=date(2024, 1, index),
+            read_finish=date(2024, 2, index),
+            read_comments="Обсуждение в чате , по пятницам .",
+            is_started=lambda: False,
+            is_finished=lambda: False,
+            is_planned=lambda: False,
+        )
+        for index in range(1, 13)
+    ]
+    categories = [
+        SimpleNamespace(
+            id=index,
+            name=f"Категория {index}",
+            books=books,
+            leaders=[books[:2], books[2:3]],
+        )
+        for index in range(1, 17)
+    ]
+    return {
+        "category": categories[0],
+        "categories": categories,
+        "leaders": [categories[:1], categories[1:3]],
+        "now_read_books": books[:3],
+        "next_book": books[3],
+        "date_now": date(2024, 1, 2),
+        "already_read_books": books,
+        "selected_values": books[:3],
+        "status": "now",
+        "voting": SimpleNamespace(
+            voting_start=date(2024, 1, 1), voting_finish=date(2024, 1, 8)
+        ),
+        "count": 42,
+        "pool_status": "Pool size: 5",
+        "timers": [Timer("db_query", 10, 0.5, 0.2)],
+    }
+
+
+def main(args: argparse.Namespace) -> int:
+    env = _get_template_env()
+    data = sample_data()
+    old_total = new_total = 0.0
+    failed = False
+
+    for path in sorted(config.TEMPLATES_DIR.glob("*.j2")):
+        raw = env.get_template(path.name).render(**data)
+        identical = old_normalize_whitespace(raw) == normalize_whitespace(raw)
+        failed = failed or not identical
+
+        old = timeit.timeit(lambda: old_normalize_whitespace(raw), number=args.number)
+        new = timeit.timeit(lambda: normalize_whitespace(raw), number=args.number)
+        old_total += old
+        new_total += new
+        print(
+            f"{path.name:<36} {len(raw):>6} chars "
+            f"old {old / args.number * 1e6:7.1f} us  new {new / args.number * 1e6:7.1f} us"
+            f"{'' if identical else '  OUTPUT DIFFERS'}"
+        )
+
+    print(f"{'total':<49} old {old_total:7.3f} s   new {new_total:7.3f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=2000)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,249 @@
+"""Measures how vote throughput scales with the number of bot workers.
+
+Opens a book voting, then for every worker count starts the bot in
+webhook mode against the fake Bot API of fake_telegram.py and lets every
+user press the vote button and send a ballot right away, like at the
+opening of a voting. A user is done when the bot confirmed the ballot.
+The voting, everything voted in it and the generated users are deleted
+afterwards. Needs the Postgres from the usual POSTGRES_* variables with a
+finished category voting that has results. While it runs the bench voting
+is the current one, so never point it at the database of a live bot.
+
+    python scripts/bench_workers.py --i-know-this-db-is-disposable
+        [--workers 1 2 4] [--users 300] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+from sqlalchemy import text
+
+sys.path.insert(0, ".")
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_telegram import (  # noqa: E402
+    API_PORT,
+    WEBAPP_PORT,
+    FakeTelegram,
+    message_update,
+    percentile,
+    start_bot,
+)
+from itamliterature.db import DBManager  # noqa: E402
+from itamliterature.keyboards import keyboards  # noqa: E402
+
+# the vote button answers with two messages, the ballot with one more
+MESSAGES_PER_USER = 3
+
+CLEANUP = [
+    "DELETE FROM vote_book WHERE voting_id = :voting_id",
+    "DELETE FROM ballot_tally WHERE voting_id = :voting_id",
+    "DELETE FROM voting_snapshot WHERE voting_id = :voting_id",
+    "DELETE FROM voting_results WHERE voting_id = :voting_id",
+    "DELETE FROM voting WHERE id = :voting_id",
+]
+# run per range of generated users
+CLEANUP_USERS = [
+    "DELETE FROM fsm_record WHERE user_id BETWEEN :first AND :last",
+    "DELETE FROM bot_user WHERE telegram_id BETWEEN :first AND :last",
+]
+# every run votes with users of its own, all above FIRST_USER
+FIRST_USER = 20_000_000
+USERS_PER_RUN = 1_000_000
+
+
+class CountingTelegram(FakeTelegram):
+    """FakeTelegram that also remembers when a chat got its last message."""
+
+    def __init__(self):
+        super().__init__()
+        self.counts: dict[int, int] = {}
+        self.done: dict[int, float] = {}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        response = await super().handle(request)
+        if request.match_info["method"] == "sendMessage":
+            chat_id = int((await request.post())["chat_id"])
+            self.counts[chat_id] = self.counts.get(chat_id, 0) + 1
+            if self.counts[chat_id] == MESSAGES_PER_USER:
+                self.done[chat_id] = time.perf_counter()
+        return response
+
+
+async def run(
+    workers: int, users: int, first_user: int, ballots: list[str], concurrency: int
+) -> dict:
+    telegram = CountingTelegram()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", telegram.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+
+    workdir = tempfile.TemporaryDirectory(prefix="bench_workers_")
+    bot = await start_bot(workdir.name, BOT_WORKERS=str(workers))
+
+    url = f"http://127.0.0.1:{WEBAPP_PORT}/webhook"
+    chats = range(first_user, first_user + users)
+    sent: dict[int, float] = {}
+    try:
+        await asyncio.wait_for(telegram.webhook_set.wait(), timeout=60)
+        await asyncio.sleep(0.5)
+
+        async with aiohttp.ClientSession() as session:
+            # workers start after the supervisor, every one is warmed up first
+            warm_up = [first_user - 1 - shard for shard in range(workers)]
+            for chat_id in warm_up:
+                await session.post(url, json=message_update(chat_id, chat_id, "/help"))
+            while not all(chat_id in telegram.replies for chat_id in warm_up):
+                await asyncio.sleep(0.05)
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def vote(number: int, chat_id: int) -> None:
+                async with semaphore:
+                    sent[chat_id] = time.perf_counter()
+                    # the second update is sent before the first one is
+                    # answered, the bot has to keep them in order
+                    for step, text in enumerate(
+                        (keyboards.button_vote, ballots[number % len(ballots)])
+                    ):
+                        update = message_update(2 * number + step + 1, chat_id, text)
+                        async with session.post(url, json=update) as response:
+                            response.raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(vote(number, chat_id) for number, chat_id in enumerate(chats))
+            )
+
+            deadline = time.perf_counter() + 120
+            while len(telegram.done) < users and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - started
+    finally:
+        bot.terminate()
+        await bot.wait()
+        workdir.cleanup()
+        await runner.cleanup()
+
+    latencies = [
+        telegram.done[chat_id] - sent[chat_id]
+        for chat_id in sent
+        if chat_id in telegram.done
+    ]
+    return {"done": len(latencies), "elapsed": elapsed, "latencies": latencies}
+
+
+async def main(args: argparse.Namespace) -> int:
+    if not args.i_know_this_db_is_disposable:
+        print(
+            "the benchmark opens a voting and writes users and ballots, run it "
+            "against a throwaway database with --i-know-this-db-is-disposable"
+        )
+        return 2
+
+    db = DBManager()
+    db.engine.echo = False
+    await db.init()
+
+    last_voting = await db.get_last_voting()
+    if last_voting is None or last_voting.voting_type != 1:
+        print("the last finished voting has to be a category voting")
+        await db.close_connection()
+        return 1
+
+    async with db.engine.begin() as connection:
+        voting_id = (
+            await connection.execute(
+                text(
+                    "INSERT INTO voting (voting_start, voting_finish, voting_type) "
+                    "VALUES (current_date - 36500, current_date + 36500, 2) RETURNING id"
+                )
+            )
+        ).scalar_one()
+    # ballots pick books of the categories the last category voting chose
+    categories = await db.get_category_by_index(
+        await db.get_voting_results(last_voting.id)
+    )
+    books = [
+        book.id
+        for book in await db.get_books()
+        if book.category_id in {category.id for category in categories}
+    ]
+    ballots = [
+        " ".join(str(books[(index + shift) % len(books)]) for shift in (0, 3, 7))
+        for index in range(len(books))
+    ]
+
+    failed = False
+    # (first, last) of the users every run generated, warm-up users included
+    user_ranges = []
+    try:
+        for run_number, workers in enumerate(args.workers):
+            first_user = FIRST_USER + run_number * USERS_PER_RUN
+            user_ranges.append((first_user - workers, first_user + args.users - 1))
+            # voters have started the bot before
+            async with db.engine.begin() as connection:
+                await connection.execute(
+                    text(
+                        "INSERT INTO bot_user (telegram_id) SELECT g "
+                        "FROM generate_series(CAST(:first AS bigint), :last) g"
+                    ),
+                    {"first": first_user, "last": first_user + args.users - 1},
+                )
+            result = await run(
+                workers, args.users, first_user, ballots, args.concurrency
+            )
+            async with db.engine.connect() as connection:
+                votes = (
+                    await connection.execute(
+                        text(
+                            "SELECT count(*) FROM vote_book "
+                            "WHERE voting_id = :voting_id "
+                            "AND user_id BETWEEN :first AND :last"
+                        ),
+                        {
+                            "voting_id": voting_id,
+                            "first": first_user,
+                            "last": first_user + args.users - 1,
+                        },
+                    )
+                ).scalar_one()
+            failed = failed or votes < args.users
+            latencies = result["latencies"] or [0.0]
+            print(
+                f"workers {workers:>2}  voted {votes}/{args.users}  "
+                f"{result['done'] / result['elapsed']:6.0f} votes/s  "
+                f"mean {statistics.mean(latencies) * 1000:7.1f} ms  "
+                f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms"
+            )
+    finally:
+        async with db.engine.begin() as connection:
+            for query in CLEANUP:
+                await connection.execute(text(query), {"voting_id": voting_id})
+            for first, last in user_ranges:
+                for query in CLEANUP_USERS:
+                    await connection.execute(
+                        text(query), {"first": first, "last": last}
+                    )
+        await db.close_connection()
+
+    print(f"{os.cpu_count()} cpus")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--i-know-this-db-is-disposable", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
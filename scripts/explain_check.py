@@ -0,0 +1,213 @@
+"""Fails if a DBManager query falls back to a sequential scan.
+
+Seeds synthetic volume inside one transaction, runs the DBManager queries
+against it, EXPLAINs every statement they sent and rolls everything back.
+Run it from the repository root against a local Postgres:
+
+    python scripts/explain_check.py [--users 2000] [--votings 2000] [--voted 20]
+        [--books 5000] [--categories 500]
+
+Statements without a WHERE clause read whole tables by design (the catalog
+and the voting state) and are not checked, neither are whole table counts.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+sys.path.insert(0, ".")
+
+from itamliterature.db import DBManager  # noqa: E402
+from itamliterature.models import models  # noqa: E402
+
+
+SEED = [
+    "INSERT INTO voting_type (id, vote_type_name) "
+    "VALUES (1, 'category'), (2, 'book') ON CONFLICT DO NOTHING",
+    "INSERT INTO book_category (id, name) "
+    "SELECT 1000000 + g, 'category ' || g FROM generate_series(1, :categories) g",
+    "INSERT INTO bot_user (telegram_id, is_admin) "
+    "SELECT 1000000000000 + g, g % 500 = 0 FROM generate_series(1, :users) g",
+    "INSERT INTO book (id, name, category_id, read_start, read_finish) "
+    "SELECT 1000000 + g, 'book ' || g || ' :: author', "
+    "(SELECT array_agg(id) FROM book_category)[1 + g % (SELECT count(*) FROM book_category)], "
+    "CASE WHEN g % 50 = 0 THEN date '1900-01-01' + g END, "
+    "CASE WHEN g % 50 = 0 THEN date '1900-01-01' + g + 30 END "
+    "FROM generate_series(1, :books) g",
+    "INSERT INTO voting (id, voting_start, voting_finish, voting_type) "
+    "SELECT 1000000 + g, date '1800-01-01' + g * 30, date '1800-01-01' + g * 30 + 7, "
+    "1 + g % 2 FROM generate_series(1, :votings) g",
+    "INSERT INTO voting_results "
+    "(voting_id, voting_type, first_place_id, second_place_id, third_place_id) "
+    "SELECT id, voting_type, 1, 2, 3 FROM voting WHERE id > 1000000",
+    "INSERT INTO voting_snapshot "
+    "(voting_id, ballot_version, ranks_version, votes_count, rankings) "
+    "SELECT id, 0, 0, 0, '[]' FROM voting WHERE id > 1000000",
+    "INSERT INTO vote_category "
+    "(voting_id, user_id, first_category_id, second_category_id, third_category_id) "
+    "SELECT v.id, u.telegram_id, c[1 + u.telegram_id % n], "
+    "c[1 + (u.telegram_id + 1) % n], c[1 + (u.telegram_id + 2) % n] "
+    "FROM voting v, bot_user u, "
+    "(SELECT array_agg(id) c, count(*) n FROM book_category) categories "
+    "WHERE v.id > 1000000 + :votings - :voted AND v.voting_type = 1 "
+    "AND u.telegram_id > 1000000000000",
+    "INSERT INTO vote_book "
+    "(voting_id, user_id, first_book_id, second_book_id, third_book_id) "
+    "SELECT v.id, u.telegram_id, 1000001 + u.telegram_id % :books, "
+    "1000001 + (u.telegram_id + 7) % :books, 1000001 + (u.telegram_id + 13) % :books "
+    "FROM voting v, bot_user u "
+    "WHERE v.id > 1000000 + :votings - :voted AND v.voting_type = 2 "
+    "AND u.telegram_id > 1000000000000",
+    "INSERT INTO ballot_tally (voting_id, first_id, second_id, third_id, count) "
+    "SELECT voting_id, first_category_id, second_category_id, third_category_id, count(*) "
+    "FROM vote_category WHERE voting_id > 1000000 GROUP BY 1, 2, 3, 4",
+    "INSERT INTO ballot_tally (voting_id, first_id, second_id, third_id, count) "
+    "SELECT voting_id, first_book_id, second_book_id, third_book_id, count(*) "
+    "FROM vote_book WHERE voting_id > 1000000 GROUP BY 1, 2, 3, 4",
+    "INSERT INTO fsm_record (chat_id, user_id, state, data, updated_at) "
+    "SELECT telegram_id, telegram_id, 'VoteStates:vote', '{}', "
+    "now() - interval '1 minute' * (telegram_id % 100000) "
+    "FROM bot_user WHERE telegram_id > 1000000000000",
+    "INSERT INTO broadcast (kind, voting_id, text, finished_at) "
+    "SELECT 'voting_start', id, 'text', now() FROM voting WHERE id > 1000000",
+    "INSERT INTO broadcast_delivery (broadcast_id, user_id, status) "
+    "SELECT b.id, u.telegram_id, 'sent' FROM broadcast b, bot_user u "
+    "WHERE b.voting_id > 1000000 + :votings - :voted "
+    "AND u.telegram_id > 1000000000000",
+    "ANALYZE",
+]
+
+
+def seq_scans(plan: dict, parent: Optional[dict] = None) -> list[str]:
+    found = []
+    # an unfiltered scan under a plain aggregate counts the whole table
+    whole_table = (
+        parent is not None
+        and parent.get("Node Type") == "Aggregate"
+        and parent.get("Strategy") == "Plain"
+        and "Filter" not in plan
+    )
+    if plan.get("Node Type") == "Seq Scan" and not whole_table:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child, plan))
+    return found
+
+
+async def exercise(db: DBManager, category_voting: int, book_voting: int) -> None:
+    user_id = 1000000000001
+    # the catalog isn't loaded yet, so a page is fetched on its own
+    await db.get_category_page(3)
+    await db.get_catalog()
+    await db.get_voting_state()
+    await db._load_admins()
+    await db.insert_bot_user(user_id)
+    await db.get_user_vote(category_voting, user_id, models.Voting.Category.value)
+    await db.get_user_vote(book_voting, user_id, models.Voting.Book.value)
+    await db.get_weighted_ranks(category_voting, models.Voting.Category.value)
+    await db.get_voting_results(category_voting)
+    await db.get_voting_snapshot(book_voting)
+    await db.insert_vote(
+        book_voting, user_id, models.Voting.Book.value, models.Vote([1000001, 1000002, 1000003])
+    )
+    await db.flush_results()
+    await db.import_votes([(user_id, book_voting, 1000004, 1000005, 1000006)])
+    await db.set_reading_dates("01.01.2000", "01.02.2000", "1000001")
+
+    await db.get_fsm_record(user_id, user_id)
+    await db.save_fsm_record(user_id, user_id, "VoteStates:vote", {"a": 1}, None)
+    await db.save_fsm_record(user_id, user_id, None, {}, None)
+    await db.delete_stale_fsm_records(86400)
+
+    broadcast_id = await db.create_broadcast("voting_deadline", book_voting, "text")
+    await db.get_broadcast(broadcast_id)
+    await db.get_unfinished_broadcast_ids()
+    pending = await db.get_pending_deliveries(broadcast_id)
+    await db.save_deliveries(
+        broadcast_id, {user_id: "sent" for user_id in pending[:10]}
+    )
+    await db.finish_broadcast(broadcast_id)
+
+
+async def main(args: argparse.Namespace) -> int:
+    db = DBManager()
+    db.engine.echo = False
+    await db.init()
+
+    statements = {}
+    recording = False
+
+    @event.listens_for(db.engine.sync_engine, "before_cursor_execute")
+    def record(connection, cursor, statement, parameters, context, executemany) -> None:
+        if recording and "WHERE" in statement.upper().split():
+            # a batch is explained with the parameters of its first row
+            statements.setdefault(
+                statement, parameters[0] if executemany else parameters
+            )
+
+    failed = False
+    async with db.engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            for query in SEED:
+                await connection.execute(
+                    text(query),
+                    {
+                        "users": args.users,
+                        "votings": args.votings,
+                        "voted": args.voted,
+                        "books": args.books,
+                        "categories": args.categories,
+                    },
+                )
+
+            category_voting, book_voting = (
+                await connection.execute(
+                    text(
+                        "SELECT max(id) FILTER (WHERE voting_type = 1), "
+                        "max(id) FILTER (WHERE voting_type = 2) "
+                        "FROM voting WHERE id > 1000000"
+                    )
+                )
+            ).one()
+
+            # DBManager commits become savepoints of the seeding transaction
+            db.Session = async_sessionmaker(
+                bind=connection,
+                expire_on_commit=False,
+                join_transaction_mode="create_savepoint",
+            )
+            db._invalidate_catalog()
+            recording = True
+            await exercise(db, category_voting, book_voting)
+            recording = False
+
+            for statement, parameters in statements.items():
+                plan = await connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                plan = plan.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                scans = seq_scans(plan[0]["Plan"])
+                status = "SEQ SCAN on " + ", ".join(scans) if scans else "ok"
+                failed = failed or bool(scans)
+                print(f"{status:<40} {' '.join(statement.split())[:120]}")
+        finally:
+            await transaction.rollback()
+
+    await db.close_connection()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--votings", type=int, default=2000)
+    parser.add_argument("--voted", type=int, default=20, help="votings with ballots")
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=500)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,233 @@
+"""Runs a broadcast against a fake Bot API that answers with flood control.
+
+Creates a broadcast to a few hundred synthetic bot users, stops the sender
+halfway like a restart would and resumes it with a new one. The fake Bot API
+records every sendMessage, answers some of them with 429 and treats some
+users as having blocked the bot. Fails unless every other user got the
+message exactly once, within the global rate. Needs the Postgres from the
+usual POSTGRES_* variables, the users it added and the broadcast are
+deleted afterwards. Never point it at the database of a live bot, which
+would resume the test broadcast.
+
+    python scripts/fake_broadcast.py --i-know-this-db-is-disposable
+        [--users 300] [--rate 100] [--flood-every 97]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.bot.api import TelegramAPIServer
+from aiohttp import web
+from sqlalchemy import text
+
+sys.path.insert(0, ".")
+
+from itamliterature.broadcast import Broadcaster  # noqa: E402
+from itamliterature.db import DBManager  # noqa: E402
+
+TOKEN = "123456:fake-telegram-token"
+API_PORT = 8082
+FIRST_USER = 30_000_000
+# users with an id divisible by this have blocked the bot
+BLOCKED_EVERY = 50
+
+CLEANUP = [
+    "DELETE FROM broadcast_delivery WHERE broadcast_id = :broadcast_id",
+    "DELETE FROM broadcast WHERE id = :broadcast_id",
+    "DELETE FROM bot_user WHERE telegram_id = ANY(:user_ids)",
+]
+
+
+class FakeTelegram:
+    """sendMessage that records deliveries and answers some with 429."""
+
+    def __init__(self, flood_every: int):
+        self.flood_every = flood_every
+        self.calls = 0
+        self.floods = 0
+        self.sent: dict[int, list[float]] = defaultdict(list)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        params = dict(await request.post())
+        chat_id = int(params["chat_id"])
+        self.calls += 1
+
+        if self.flood_every and self.calls % self.flood_every == 0:
+            self.floods += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+        if chat_id % BLOCKED_EVERY == 0:
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                },
+                status=403,
+            )
+
+        self.sent[chat_id].append(time.perf_counter())
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": self.calls,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": params.get("text", ""),
+                },
+            }
+        )
+
+
+def max_per_second(stamps: list[float]) -> int:
+    stamps = sorted(stamps)
+    best = start = 0
+    for end, stamp in enumerate(stamps):
+        while stamp - stamps[start] >= 1:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+async def main(args: argparse.Namespace) -> int:
+    if not args.i_know_this_db_is_disposable:
+        print(
+            "the test writes bot users and a broadcast, run it against a "
+            "throwaway database with --i-know-this-db-is-disposable"
+        )
+        return 2
+
+    telegram = FakeTelegram(args.flood_every)
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", telegram.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+
+    bot = Bot(
+        token=TOKEN,
+        server=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}"),
+    )
+    db = DBManager()
+    db.engine.echo = False
+    await db.init()
+
+    # users that were there before the run are left alone
+    async with db.engine.begin() as connection:
+        user_ids = list(
+            await connection.scalars(
+                text(
+                    "INSERT INTO bot_user (telegram_id) SELECT g "
+                    "FROM generate_series(CAST(:first AS bigint), :last) g "
+                    "ON CONFLICT DO NOTHING RETURNING telegram_id"
+                ),
+                {"first": FIRST_USER, "last": FIRST_USER + args.users - 1},
+            )
+        )
+    broadcast_id = None
+    if not user_ids:
+        print(f"bot users {FIRST_USER}.. exist already, nothing to test with")
+
+    try:
+        broadcast_id = await db.create_broadcast("test", None, "Тестовая рассылка")
+        # only the synthetic users get the test broadcast
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                text(
+                    "DELETE FROM broadcast_delivery "
+                    "WHERE broadcast_id = :broadcast_id "
+                    "AND user_id <> ALL(:user_ids)"
+                ),
+                {"broadcast_id": broadcast_id, "user_ids": user_ids},
+            )
+
+        # stopped halfway, the second sender has to pick up the rest
+        first = Broadcaster(bot, db, rate=args.rate, concurrency=args.concurrency)
+        first._start(broadcast_id)
+        while len(telegram.sent) < len(user_ids) // 2:
+            await asyncio.sleep(0.01)
+        await first.close()
+        stopped_at = len(telegram.sent)
+
+        started = time.perf_counter()
+        second = Broadcaster(bot, db, rate=args.rate, concurrency=args.concurrency)
+        second._start(broadcast_id)
+        await asyncio.gather(*second._tasks.values())
+        elapsed = time.perf_counter() - started
+
+        async with db.engine.connect() as connection:
+            statuses = dict(
+                (
+                    await connection.execute(
+                        text(
+                            "SELECT status, count(*) FROM broadcast_delivery "
+                            "WHERE broadcast_id = :broadcast_id GROUP BY status"
+                        ),
+                        {"broadcast_id": broadcast_id},
+                    )
+                ).all()
+            )
+            finished = (
+                await connection.execute(
+                    text("SELECT finished_at FROM broadcast WHERE id = :broadcast_id"),
+                    {"broadcast_id": broadcast_id},
+                )
+            ).scalar_one()
+    finally:
+        async with db.engine.begin() as connection:
+            for query in CLEANUP:
+                await connection.execute(
+                    text(query), {"broadcast_id": broadcast_id, "user_ids": user_ids}
+                )
+        await db.close_connection()
+        await (await bot.get_session()).close()
+        await runner.cleanup()
+
+    sent = telegram.sent
+    blocked = sum(1 for user_id in user_ids if user_id % BLOCKED_EVERY == 0)
+    duplicates = sum(len(stamps) - 1 for stamps in sent.values())
+    stamps = [stamp for chat in sent.values() for stamp in chat]
+
+    print(
+        f"users {len(user_ids)}, stopped after {stopped_at}, delivered {len(sent)}, "
+        f"blocked {blocked}, duplicates {duplicates}, 429s {telegram.floods}"
+    )
+    print(
+        f"statuses {statuses}, finished {finished is not None}, "
+        f"resumed part took {elapsed:.1f} s, "
+        f"max {max_per_second(stamps)} messages in one second (limit {args.rate:.0f})"
+    )
+    ok = (
+        user_ids
+        and len(sent) == len(user_ids) - blocked
+        and duplicates == 0
+        and statuses == {"sent": len(user_ids) - blocked, "failed": blocked}
+        and finished is not None
+        and max_per_second(stamps) <= args.rate + 1
+    )
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--flood-every", type=int, default=97, help="answer every n-th call with 429"
+    )
+    parser.add_argument("--i-know-this-db-is-disposable", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,249 @@
+"""Measures update-to-reply latency of the bot in webhook mode.
+
+Starts a fake Bot API server, runs the bot against it in webhook mode and
+POSTs updates to the webhook like Telegram would. Every update comes from a
+chat of its own, so the first message the bot sends to that chat is its
+reply. Needs the Postgres from the usual POSTGRES_* variables. The bot
+writes users, FSM states and memberships there, so never point it at the
+database of a live bot; the users the /start updates add are deleted
+afterwards. The bot runs with broadcasts off and its log in a temporary
+directory.
+
+    python scripts/fake_telegram.py --i-know-this-db-is-disposable
+        [--updates 500] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+from sqlalchemy import text
+
+sys.path.insert(0, ".")
+
+from itamliterature.db import DBManager  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "123456:fake-telegram-token"
+API_PORT = 8081
+WEBAPP_PORT = 8000
+TEXTS = ("/start", "/help", "📚 Все книги", "📔 Все категории")
+# update n comes from chat FIRST_CHAT + n
+FIRST_CHAT = 10_000_000
+
+BOT_USER = {
+    "id": 123456,
+    "is_bot": True,
+    "first_name": "litra",
+    "username": "litra_bot",
+}
+
+
+class FakeTelegram:
+    """The part of the Bot API the bot calls, answering right away."""
+
+    def __init__(self):
+        self.replies: dict[int, float] = {}
+        self.webhook_set = asyncio.Event()
+        self._message_ids = itertools.count(1)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        result = True
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "setWebhook":
+            self.webhook_set.set()
+        elif method == "getChatMember":
+            result = {
+                "user": {
+                    "id": int(params["user_id"]),
+                    "is_bot": False,
+                    "first_name": "u",
+                },
+                "status": "member",
+            }
+        elif method in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            self.replies.setdefault(chat_id, time.perf_counter())
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+
+        return web.json_response({"ok": True, "result": result})
+
+
+def message_update(update_id: int, chat_id: int, text: str) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": "member"}
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": user,
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(text)}
+        ]
+    return {"update_id": update_id, "message": message}
+
+
+async def start_bot(workdir: str, **env: str) -> asyncio.subprocess.Process:
+    """Starts the bot in webhook mode against the fake Bot API.
+
+    It runs in workdir, where its debug.log goes, and never broadcasts to
+    the users of the database it is pointed at.
+    """
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_DIR,
+        TELEGRAM_BOT_TOKEN=TOKEN,
+        TELEGRAM_API_URL=f"http://127.0.0.1:{API_PORT}",
+        BOT_MODE="webhook",
+        WEBHOOK_HOST=f"http://127.0.0.1:{WEBAPP_PORT}",
+        WEBAPP_HOST="127.0.0.1",
+        WEBAPP_PORT=str(WEBAPP_PORT),
+        BROADCASTS="0",
+        **env,
+    )
+    return await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "itamliterature",
+        cwd=workdir,
+        env=env,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=open(os.environ.get("BOT_LOG", os.devnull), "w"),
+    )
+
+
+def percentile(values: list[float], share: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+async def generated_users(db: DBManager, first: int, last: int) -> set[int]:
+    """Returns the ids of first..last that aren't bot users yet."""
+    async with db.engine.connect() as connection:
+        existing = set(
+            await connection.scalars(
+                text(
+                    "SELECT telegram_id FROM bot_user "
+                    "WHERE telegram_id BETWEEN :first AND :last"
+                ),
+                {"first": first, "last": last},
+            )
+        )
+    return set(range(first, last + 1)) - existing
+
+
+async def delete_users(db: DBManager, user_ids: set[int]) -> None:
+    async with db.engine.begin() as connection:
+        for query in (
+            "DELETE FROM fsm_record WHERE user_id = ANY(:user_ids)",
+            "DELETE FROM bot_user WHERE telegram_id = ANY(:user_ids)",
+        ):
+            await connection.execute(text(query), {"user_ids": sorted(user_ids)})
+
+
+async def main(args: argparse.Namespace) -> int:
+    if not args.i_know_this_db_is_disposable:
+        print(
+            "the bot writes users, FSM states and memberships, run it against "
+            "a throwaway database with --i-know-this-db-is-disposable"
+        )
+        return 2
+
+    db = DBManager()
+    db.engine.echo = False
+    # users that were there before the run are kept
+    user_ids = await generated_users(db, FIRST_CHAT + 1, FIRST_CHAT + args.updates)
+
+    telegram = FakeTelegram()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", telegram.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+
+    workdir = tempfile.TemporaryDirectory(prefix="fake_telegram_")
+    bot = await start_bot(workdir.name)
+
+    try:
+        await asyncio.wait_for(telegram.webhook_set.wait(), timeout=60)
+        # set_webhook is the last startup step, give the site a moment to bind
+        await asyncio.sleep(0.5)
+
+        url = f"http://127.0.0.1:{WEBAPP_PORT}/webhook"
+        sent: dict[int, float] = {}
+        acks: list[float] = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async with aiohttp.ClientSession() as session:
+
+            async def post(update_id: int) -> None:
+                chat_id = FIRST_CHAT + update_id
+                update = message_update(
+                    update_id, chat_id, TEXTS[update_id % len(TEXTS)]
+                )
+                async with semaphore:
+                    started = time.perf_counter()
+                    sent[chat_id] = started
+                    async with session.post(url, json=update) as response:
+                        response.raise_for_status()
+                    acks.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(post(update_id) for update_id in range(1, args.updates + 1))
+            )
+
+            deadline = time.perf_counter() + 60
+            while len(telegram.replies) < len(sent) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - started
+    finally:
+        bot.terminate()
+        await bot.wait()
+        workdir.cleanup()
+        await runner.cleanup()
+        await delete_users(db, user_ids)
+        await db.engine.dispose()
+
+    latencies = [
+        telegram.replies[chat_id] - sent[chat_id]
+        for chat_id in sent
+        if chat_id in telegram.replies
+    ]
+    print(
+        f"updates {len(sent)}, replied {len(latencies)}, {len(latencies) / elapsed:.0f} replies/s"
+    )
+    for name, values in (("ack", acks), ("reply", latencies)):
+        if values:
+            print(
+                f"{name:<6} mean {statistics.mean(values) * 1000:7.1f} ms  "
+                f"p50 {percentile(values, 0.5) * 1000:7.1f} ms  "
+                f"p95 {percentile(values, 0.95) * 1000:7.1f} ms  "
+                f"max {max(values) * 1000:7.1f} ms"
+            )
+    return 0 if len(latencies) == len(sent) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--i-know-this-db-is-disposable", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,69 @@
+"""Broadcaster with a fake database, no Telegram or Postgres needed."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature import broadcast  # noqa: E402
+from itamliterature.broadcast import Broadcaster  # noqa: E402
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.created = []
+        self.broadcasts_created = asyncio.Event()
+
+    async def create_broadcast(self, kind, voting_id, text):
+        self.created.append(kind)
+        return len(self.created)
+
+
+def test_only_the_sender_sends():
+    async def main() -> None:
+        started = []
+        for sender in (False, True):
+            db = FakeDB()
+            broadcaster = Broadcaster(None, db, enabled=True, sender=sender)
+            broadcaster._start = started.append
+
+            await broadcaster.broadcast("voting_start", 1, "text")
+            broadcaster.start_watching()
+
+            # every worker creates the broadcast, the sender picks it up
+            assert db.created == ["voting_start"]
+            assert (broadcaster._watch_task is not None) == sender
+            if broadcaster._watch_task is not None:
+                broadcaster._watch_task.cancel()
+        assert started == [1]
+
+    asyncio.run(main())
+
+
+def test_disabled_broadcaster_creates_nothing():
+    async def main() -> None:
+        db = FakeDB()
+        broadcaster = Broadcaster(None, db, enabled=False, sender=True)
+
+        await broadcaster.broadcast("voting_start", 1, "text")
+        broadcaster.start_watching()
+
+        assert db.created == []
+        assert broadcaster._watch_task is None
+
+    asyncio.run(main())
+
+
+def test_close_cancels_broadcasts_that_dont_stop(monkeypatch):
+    monkeypatch.setattr(broadcast, "CLOSE_TIMEOUT", 0.05)
+
+    async def main() -> None:
+        broadcaster = Broadcaster(None, FakeDB(), enabled=True, sender=True)
+        stuck = asyncio.create_task(asyncio.sleep(60))
+        broadcaster._tasks[1] = stuck
+
+        await asyncio.wait_for(broadcaster.close(), 1)
+        assert stuck.cancelled()
+
+    asyncio.run(main())
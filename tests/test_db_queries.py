@@ -0,0 +1,139 @@
+"""Counts the queries catalog page views make.
+
+Runs against the bot database from the usual POSTGRES_* variables and is
+skipped when there is none. The catalog is invalidated the way an admin does
+it, by adding a category; the scratch categories are deleted afterwards.
+
+    python -m pytest tests
+"""
+
+import asyncio
+import contextlib
+import sys
+import uuid
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature.db import CACHE_CHANNEL, DBManager  # noqa: E402
+
+
+@contextlib.contextmanager
+def count_queries(db: DBManager) -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def before_cursor_execute(connection, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(db.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(
+            db.engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
+def run(test) -> None:
+    # the engine is bound to the loop it was created on, one per test
+    async def main() -> None:
+        db = DBManager()
+        db.engine.echo = False
+        try:
+            try:
+                async with db.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1 FROM book LIMIT 1"))
+            except Exception as error:
+                pytest.skip(f"no bot database: {error}")
+            await test(db)
+        finally:
+            await delete_scratch_categories(db)
+            await db.engine.dispose()
+
+    asyncio.run(main())
+
+
+async def add_scratch_category(db: DBManager) -> None:
+    # the admin write path, it drops the cached catalog
+    assert await db.add_category(f"test {uuid.uuid4().hex[:12]}")
+
+
+async def delete_scratch_categories(db: DBManager) -> None:
+    async with db.engine.begin() as connection:
+        deleted = await connection.execute(
+            text("DELETE FROM book_category WHERE name ~ '^test [0-9a-f]{12}$'")
+        )
+        if deleted.rowcount:
+            # running bots drop their catalog like after an admin write
+            await connection.execute(
+                text("SELECT pg_notify(:channel, 'catalog')"),
+                {"channel": CACHE_CHANNEL},
+            )
+
+
+def page(result) -> tuple:
+    category, count = result
+    if category is None:
+        return None, count
+    return (category.id, category.name, [book.id for book in category.books]), count
+
+
+def test_page_view_queries_dont_grow_with_categories():
+    async def test(db: DBManager) -> None:
+        categories = await db.get_categories()
+        if len(categories) < 2:
+            pytest.skip("needs a catalog with two categories at least")
+
+        counts = []
+        for size in (1, len(categories)):
+            await add_scratch_category(db)
+            with count_queries(db) as statements:
+                await db.get_categories_with_books(categories[:size])
+            counts.append(len(statements))
+
+        assert counts[0] == counts[1] <= 2
+
+        # a loaded catalog serves the page without the database
+        with count_queries(db) as statements:
+            await db.get_all_categories_with_books()
+        assert statements == []
+
+    run(test)
+
+
+def test_category_page_cold_and_warm():
+    async def test(db: DBManager) -> None:
+        # the newest category is the last page
+        await add_scratch_category(db)
+
+        cold = {}
+        with count_queries(db) as statements:
+            cold[0] = page(await db.get_category_page(0))
+        assert 1 <= len(statements) <= 2
+        total = cold[0][1]
+        for index in (total - 1, total, total + 10):
+            with count_queries(db) as statements:
+                cold[index] = page(await db.get_category_page(index))
+            # a page is fetched on its own, not through the whole catalog
+            assert 1 <= len(statements) <= 2
+
+        assert cold[total - 1][0][1].startswith("test ")
+        assert cold[total - 1][0][2] == []
+        assert cold[total] == cold[total + 10] == (None, total)
+
+        categories = await db.get_all_categories_with_books()
+        assert len(categories) == total
+        for index in (0, total - 1):
+            assert cold[index] == page((categories[index], total))
+
+        with count_queries(db) as statements:
+            warm = {index: page(await db.get_category_page(index)) for index in cold}
+            assert await db.get_category_page(-1) == (None, total)
+        assert statements == []
+        assert warm == cold
+
+    run(test)
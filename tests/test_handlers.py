@@ -0,0 +1,75 @@
+"""Renders bot handlers with a fake database, no Telegram or Postgres needed."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature import config  # noqa: E402
+from itamliterature.models import db_models, models  # noqa: E402
+
+
+class FakeMessage:
+    def __init__(self, user_id: int) -> None:
+        self.from_user = SimpleNamespace(id=user_id)
+        self.answers = []
+
+    async def answer(self, text: str, reply_markup=None) -> None:
+        self.answers.append((text, reply_markup))
+
+
+@pytest.fixture
+def bot_module(monkeypatch):
+    # the module builds its Bot on import, aiogram checks the token format
+    monkeypatch.setattr(config, "TELEGRAM_BOT_TOKEN", "123456:fake-token")
+    from itamliterature import __main__ as bot_module
+
+    return bot_module
+
+
+def category(category_id: int, name: str) -> models.Category:
+    return models.Category(db_models.BookCategory(id=category_id, name=name))
+
+
+def test_category_voting_lists_the_categories(bot_module, monkeypatch):
+    async def is_member(user_id: int) -> bool:
+        return True
+
+    async def get_current_or_last_voting():
+        return "now", db_models.Voting(id=1, voting_type=models.Voting.Category.value)
+
+    async def get_categories():
+        return [category(3, "Python"), category(5, "Rust")]
+
+    entered = []
+
+    async def set_state() -> None:
+        entered.append(True)
+
+    monkeypatch.setattr(bot_module.membership, "is_member", is_member)
+    monkeypatch.setattr(
+        bot_module,
+        "db",
+        SimpleNamespace(
+            catalog_version=-1,
+            get_current_or_last_voting=get_current_or_last_voting,
+            get_categories=get_categories,
+        ),
+    )
+    monkeypatch.setattr(bot_module.states.Voting.in_vote_mode, "set", set_state)
+
+    message = FakeMessage(42)
+    asyncio.run(bot_module.vote(message))
+
+    (description, _), (listing, keyboard) = message.answers
+    assert "три категории" in description
+    assert "3. Python\n5. Rust" in listing
+    buttons = [button for row in keyboard.inline_keyboard for button in row]
+    assert [button.callback_data for button in buttons] == [
+        f"{config.LITRA_CALLBACK_PREFIX}cancel"
+    ]
+    assert entered == [True]
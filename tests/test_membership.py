@@ -0,0 +1,62 @@
+"""MembershipCache with a fake bot, no Telegram needed."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature.broadcast import RateLimiter  # noqa: E402
+from itamliterature.membership import MembershipCache  # noqa: E402
+
+
+class FakeBot:
+    def __init__(self, members: set[int]) -> None:
+        self.members = members
+        self.calls: list[tuple[int, float]] = []
+
+    async def get_chat_member(self, chat_id: int, user_id: int):
+        self.calls.append((user_id, time.monotonic()))
+        return SimpleNamespace(status="member" if user_id in self.members else "left")
+
+
+def test_cache_forgets_the_least_recently_asked():
+    async def main() -> None:
+        bot = FakeBot({1, 2, 3})
+        cache = MembershipCache(bot, chat_id=-1, max_size=2)
+
+        assert await cache.is_member(1)
+        assert await cache.is_member(2)
+        assert await cache.is_member(1)
+        # 2 is the least recently asked now
+        assert await cache.is_member(3)
+        assert len(bot.calls) == 3
+
+        assert await cache.is_member(1)
+        assert await cache.is_member(3)
+        assert len(bot.calls) == 3
+        assert await cache.is_member(2)
+        assert [user_id for user_id, _ in bot.calls] == [1, 2, 3, 2]
+
+    asyncio.run(main())
+
+
+def test_warm_up_goes_through_the_limiter():
+    async def main() -> None:
+        bot = FakeBot({1})
+        cache = MembershipCache(
+            bot, chat_id=-1, limiter=RateLimiter(rate=50, chat_interval=0)
+        )
+
+        cache.start_warm_up(range(10))
+        await cache._warm_up_task
+
+        asked = [at for _, at in bot.calls]
+        assert len(asked) == 10
+        assert asked[-1] - asked[0] >= 9 / 50 * 0.9
+        assert await cache.is_member(1) and not await cache.is_member(2)
+        assert len(bot.calls) == 10
+
+    asyncio.run(main())
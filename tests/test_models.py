@@ -0,0 +1,105 @@
+"""Catalog and voting state snapshots, no database needed."""
+
+import asyncio
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature.db import DBManager  # noqa: E402
+from itamliterature.models import db_models, models  # noqa: E402
+
+
+def build_catalog() -> models.Catalog:
+    categories = [
+        db_models.BookCategory(id=category_id, name=f"category {category_id}")
+        for category_id in (3, 1, 2)
+    ]
+    books = [
+        db_models.Book(id=10, name="Solaris :: Lem", category_id=2),
+        db_models.Book(id=11, name="Untitled", category_id=1),
+        db_models.Book(id=12, name="Roadside Picnic :: Strugatsky", category_id=2),
+    ]
+    # the db returns both ordered by id
+    categories.sort(key=lambda category: category.id)
+    return models.Catalog.build(7, categories, books)
+
+
+def voting(voting_id: int, finish: date) -> db_models.Voting:
+    return db_models.Voting(
+        id=voting_id,
+        voting_start=date(2024, 1, 1),
+        voting_finish=finish,
+        voting_type=1,
+    )
+
+
+def test_catalog_groups_books_by_category():
+    catalog = build_catalog()
+
+    assert catalog.version == 7
+    assert [category.id for category in catalog.categories] == [1, 2, 3]
+    assert [book.id for book in catalog.categories_by_id[2].books] == [10, 12]
+    assert catalog.categories_by_id[3].books == []
+    assert catalog.books_by_id[10].name == "Solaris"
+    assert catalog.books_by_id[10].author == "Lem"
+    assert catalog.books_by_id[11].author == ""
+    assert catalog.book_rows[12].name == "Roadside Picnic :: Strugatsky"
+
+
+def test_category_page_from_catalog():
+    async def main() -> None:
+        db = DBManager()
+        db._catalog = build_catalog()
+        try:
+            first, count = await db.get_category_page(0)
+            assert (first.id, count) == (1, 3)
+            assert [book.id for book in first.books] == [11]
+
+            last, count = await db.get_category_page(2)
+            assert (last.id, last.books, count) == (3, [], 3)
+
+            assert await db.get_category_page(3) == (None, 3)
+            assert await db.get_category_page(-1) == (None, 3)
+
+            # a page is a copy, the snapshot stays as it was
+            first.books.clear()
+            first.name = "changed"
+            assert db._catalog.categories[0].name == "category 1"
+            assert len(db._catalog.categories[0].books) == 1
+        finally:
+            await db.engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_voting_state_without_votings():
+    state = models.VotingState.build(1, [], datetime(2024, 3, 1))
+
+    assert (state.status, state.voting, state.last_finished) == ("no_voting", None, None)
+    assert not state.is_expired(datetime(2100, 1, 1))
+
+
+def test_voting_state_of_an_ongoing_voting():
+    finished, ongoing = voting(1, date(2024, 2, 1)), voting(2, date(2024, 3, 10))
+    state = models.VotingState.build(1, [finished, ongoing], datetime(2024, 3, 1))
+
+    assert (state.status, state.voting, state.last_finished) == (
+        "now",
+        ongoing,
+        finished,
+    )
+    # a voting ends when its finish day starts
+    assert state.expires_at == datetime(2024, 3, 10)
+    assert not state.is_expired(datetime(2024, 3, 9, 23, 59))
+    assert state.is_expired(datetime(2024, 3, 10))
+
+
+def test_voting_state_after_the_last_voting():
+    first, second = voting(1, date(2024, 2, 1)), voting(2, date(2024, 3, 1))
+    state = models.VotingState.build(1, [first, second], datetime(2024, 3, 5))
+
+    assert (state.status, state.voting, state.last_finished) == ("last", second, second)
+    assert state.expires_at is None
+    assert not state.is_expired(datetime(2100, 1, 1))
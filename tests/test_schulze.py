@@ -0,0 +1,73 @@
+"""The matrix engine has to rank exactly like the original dict engine."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from itamliterature.utils import schulze  # noqa: E402
+
+
+def random_ballots(rng: random.Random, candidates: list, count: int) -> list:
+    ballots = []
+    for _ in range(count):
+        picked = rng.sample(candidates, rng.randint(1, min(4, len(candidates))))
+        # mostly the bot's three single choices, sometimes a tie
+        ranks = [[candidate] for candidate in picked]
+        if len(ranks) > 1 and rng.random() < 0.2:
+            ranks[0:2] = [ranks[0] + ranks[1]]
+        ballots.append((ranks, rng.randint(1, 3)))
+    return ballots
+
+
+def normalized(ranking: list) -> list:
+    return [sorted(group) for group in ranking]
+
+
+@pytest.fixture(params=["numpy", "lists"])
+def engine_backend(request, monkeypatch):
+    if request.param == "lists":
+        monkeypatch.setattr(schulze, "np", None)
+    elif schulze.np is None:
+        pytest.skip("numpy isn't installed")
+
+
+def test_engines_rank_alike(engine_backend):
+    rng = random.Random(1)
+    for _ in range(300):
+        candidates = list(range(1, rng.randint(2, 12)))
+        ballots = random_ballots(rng, candidates, rng.randint(0, 25))
+
+        assert normalized(
+            schulze.compute_ranks(candidates, ballots, engine="matrix")
+        ) == normalized(schulze.compute_ranks(candidates, ballots, engine="dict"))
+
+
+def test_incremental_matrix_ranks_like_a_fresh_one(engine_backend):
+    rng = random.Random(2)
+    for _ in range(100):
+        candidates = list(range(1, rng.randint(2, 10)))
+        matrix = schulze.PairwiseMatrix(candidates)
+        ballots = []
+        for _ in range(30):
+            if ballots and rng.random() < 0.3:
+                # a member votes again, the old ballot is taken back
+                ranks, weight = ballots.pop(rng.randrange(len(ballots)))
+                matrix.remove_ballot(ranks, weight)
+            else:
+                (ballot,) = random_ballots(rng, candidates, 1)
+                ballots.append(ballot)
+                matrix.add_ballot(*ballot)
+
+            assert matrix.ballots_count == sum(weight for _, weight in ballots)
+            assert normalized(matrix.compute_ranks()) == normalized(
+                schulze.compute_ranks(candidates, ballots, engine="dict")
+            )
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        schulze.compute_ranks([1, 2], [], engine="quantum")